@@ -8,6 +8,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from db.Base import Base
+from db.search_index import is_search_index
 import db.models  # noqa: F401
 
 # this is the Alembic Config object, which provides
@@ -28,6 +29,12 @@ if database_url:
 # add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # Índices de busca são DDL de dialeto (ver db/search_index.py)
+    return not (name and is_search_index(name, type_))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -52,6 +59,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -73,7 +81,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,39 @@
+"""games next check at
+
+Revision ID: 1b9e4f7a3c28
+Revises: f6a2d8c3b517
+Create Date: 2026-10-17 18:40:12.884051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b9e4f7a3c28'
+down_revision: Union[str, Sequence[str], None] = 'f6a2d8c3b517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Default constante (o SQLite não aceita CURRENT_TIMESTAMP em ADD COLUMN NOT NULL):
+    # jogos existentes ficam vencidos e são agendados no primeiro tick do monitor.
+    # Sem batch_alter_table para não recriar games (e perder os triggers da FTS)
+    op.add_column('games', sa.Column(
+        'next_check_at',
+        sa.DateTime(timezone=True),
+        nullable=False,
+        server_default='1970-01-01 00:00:00'
+    ))
+    op.create_index(op.f('ix_games_next_check_at'), 'games', ['next_check_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_games_next_check_at'), table_name='games')
+    # DROP COLUMN direto (SQLite >= 3.35): batch recriaria games sem os triggers da FTS
+    op.drop_column('games', 'next_check_at')
@@ -0,0 +1,42 @@
+"""price alerts
+
+Revision ID: 3c9a51d2e7b4
+Revises: 0f0b0746c66d
+Create Date: 2026-10-17 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a51d2e7b4'
+down_revision: Union[str, Sequence[str], None] = '0f0b0746c66d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('price_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('deal_id', sa.Integer(), nullable=False),
+    sa.Column('alert_type', sa.String(), nullable=False),
+    sa.Column('previous_price', sa.Float(), nullable=True),
+    sa.Column('new_price', sa.Float(), nullable=False),
+    sa.Column('discount_percentage', sa.Float(), nullable=True),
+    sa.Column('message', sa.String(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['deal_id'], ['deals.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_price_alerts_deal_id'), 'price_alerts', ['deal_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_price_alerts_deal_id'), table_name='price_alerts')
+    op.drop_table('price_alerts')
@@ -0,0 +1,42 @@
+"""monitor shard stats
+
+Revision ID: 5ae3429d2c6a
+Revises: 1b9e4f7a3c28
+Create Date: 2026-10-17 18:41:09.318027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5ae3429d2c6a'
+down_revision: Union[str, Sequence[str], None] = '1b9e4f7a3c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Uma linha por shard do monitor, somada pelo líder a cada tick
+    op.create_table('monitor_shard_stats',
+    sa.Column('shard_index', sa.Integer(), nullable=False),
+    sa.Column('shard_count', sa.Integer(), nullable=False),
+    sa.Column('ticks', sa.Integer(), nullable=False),
+    sa.Column('games_checked', sa.Integer(), nullable=False),
+    sa.Column('games_unchanged', sa.Integer(), nullable=False),
+    sa.Column('deals_updated', sa.Integer(), nullable=False),
+    sa.Column('new_sales', sa.Integer(), nullable=False),
+    sa.Column('price_drops', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=False),
+    sa.Column('last_tick_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('shard_index')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monitor_shard_stats')
@@ -0,0 +1,44 @@
+"""price history daily rollups
+
+Revision ID: 5d8e3a7c9f12
+Revises: a41f6c8d2b95
+Create Date: 2026-10-17 13:02:18.551730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e3a7c9f12'
+down_revision: Union[str, Sequence[str], None] = 'a41f6c8d2b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Preenchida pelo job: python -m jobs.backfill_price_rollups
+    op.create_table('price_history_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('deal_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open_price', sa.Float(), nullable=False),
+    sa.Column('high_price', sa.Float(), nullable=False),
+    sa.Column('low_price', sa.Float(), nullable=False),
+    sa.Column('close_price', sa.Float(), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('max_discount_percent', sa.Float(), nullable=True),
+    sa.Column('first_checked_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['deal_id'], ['deals.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('deal_id', 'day', name='uq_price_history_daily_deal_day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('price_history_daily')
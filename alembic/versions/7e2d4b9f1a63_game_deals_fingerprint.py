@@ -0,0 +1,31 @@
+"""game deals fingerprint
+
+Revision ID: 7e2d4b9f1a63
+Revises: 3c9a51d2e7b4
+Create Date: 2026-10-17 10:05:12.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2d4b9f1a63'
+down_revision: Union[str, Sequence[str], None] = '3c9a51d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('games', sa.Column('deals_fingerprint', sa.String(), nullable=True))
+    op.add_column('games', sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('games') as batch_op:
+        batch_op.drop_column('last_checked_at')
+        batch_op.drop_column('deals_fingerprint')
@@ -0,0 +1,57 @@
+"""price history composite index and latest pointer
+
+Revision ID: a41f6c8d2b95
+Revises: 7e2d4b9f1a63
+Create Date: 2026-10-17 11:20:37.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c8d2b95'
+down_revision: Union[str, Sequence[str], None] = '7e2d4b9f1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices redundantes: a PK já é indexada e (deal_id, checked_at) cobre deal_id
+    op.drop_index(op.f('ix_games_id'), table_name='games')
+    op.drop_index(op.f('ix_deals_id'), table_name='deals')
+    op.drop_index(op.f('ix_price_history_id'), table_name='price_history')
+    op.drop_index(op.f('ix_price_history_deal_id'), table_name='price_history')
+    op.create_index(
+        'ix_price_history_deal_id_checked_at',
+        'price_history',
+        ['deal_id', sa.text('checked_at DESC')],
+        unique=False
+    )
+
+    op.add_column('deals', sa.Column('last_history_id', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE deals SET last_history_id = (
+            SELECT ph.id FROM price_history ph
+            WHERE ph.deal_id = deals.id
+            ORDER BY ph.checked_at DESC, ph.id DESC
+            LIMIT 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('deals') as batch_op:
+        batch_op.drop_column('last_history_id')
+
+    op.drop_index('ix_price_history_deal_id_checked_at', table_name='price_history')
+    op.create_index(op.f('ix_price_history_deal_id'), 'price_history', ['deal_id'], unique=False)
+    op.create_index(op.f('ix_price_history_id'), 'price_history', ['id'], unique=False)
+    op.create_index(op.f('ix_deals_id'), 'deals', ['id'], unique=False)
+    op.create_index(op.f('ix_games_id'), 'games', ['id'], unique=False)
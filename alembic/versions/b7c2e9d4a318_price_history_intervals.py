@@ -0,0 +1,31 @@
+"""price history intervals
+
+Revision ID: b7c2e9d4a318
+Revises: 5d8e3a7c9f12
+Create Date: 2026-10-17 14:11:46.302518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c2e9d4a318'
+down_revision: Union[str, Sequence[str], None] = '5d8e3a7c9f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('price_history', sa.Column('valid_to', sa.DateTime(timezone=True), nullable=True))
+    # Linhas existentes viram intervalos de um único ponto
+    op.execute("UPDATE price_history SET valid_to = checked_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('price_history') as batch_op:
+        batch_op.drop_column('valid_to')
@@ -0,0 +1,76 @@
+"""game price summary
+
+Revision ID: c4e8f1a9d276
+Revises: b7c2e9d4a318
+Create Date: 2026-10-17 15:36:09.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8f1a9d276'
+down_revision: Union[str, Sequence[str], None] = 'b7c2e9d4a318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('game_price_summary',
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('best_price', sa.Float(), nullable=True),
+    sa.Column('best_deal_id', sa.String(), nullable=True),
+    sa.Column('best_store_name', sa.String(), nullable=True),
+    sa.Column('max_discount_percent', sa.Float(), nullable=True),
+    sa.Column('deal_count', sa.Integer(), nullable=False),
+    sa.Column('all_time_low', sa.Float(), nullable=True),
+    sa.Column('all_time_low_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.PrimaryKeyConstraint('game_id')
+    )
+    op.create_index('ix_game_price_summary_best_price', 'game_price_summary', ['best_price', 'game_id'], unique=False)
+    op.create_index(
+        'ix_game_price_summary_max_discount',
+        'game_price_summary',
+        [sa.text('max_discount_percent DESC'), 'game_id'],
+        unique=False
+    )
+
+    # Backfill: melhor deal atual de cada jogo e menor preço já visto no histórico
+    op.execute(
+        """
+        INSERT INTO game_price_summary (
+            game_id, best_price, best_deal_id, best_store_name, max_discount_percent,
+            deal_count, all_time_low, all_time_low_at, updated_at
+        )
+        SELECT g.id, best.current_price, best.deal_id, best.store_name, agg.max_discount,
+               COALESCE(agg.deal_count, 0), low.price, low.checked_at, CURRENT_TIMESTAMP
+        FROM games g
+        LEFT JOIN (
+            SELECT game_id, MAX(discount_percentage) AS max_discount, COUNT(*) AS deal_count
+            FROM deals GROUP BY game_id
+        ) agg ON agg.game_id = g.id
+        LEFT JOIN (
+            SELECT game_id, current_price, deal_id, store_name,
+                   ROW_NUMBER() OVER (PARTITION BY game_id ORDER BY current_price, id) AS rn
+            FROM deals
+        ) best ON best.game_id = g.id AND best.rn = 1
+        LEFT JOIN (
+            SELECT d.game_id, ph.price, ph.checked_at,
+                   ROW_NUMBER() OVER (PARTITION BY d.game_id ORDER BY ph.price, ph.checked_at) AS rn
+            FROM price_history ph JOIN deals d ON d.id = ph.deal_id
+        ) low ON low.game_id = g.id AND low.rn = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_game_price_summary_max_discount', table_name='game_price_summary')
+    op.drop_index('ix_game_price_summary_best_price', table_name='game_price_summary')
+    op.drop_table('game_price_summary')
@@ -0,0 +1,66 @@
+"""games title search index
+
+Revision ID: e3b5a7c1f904
+Revises: c4e8f1a9d276
+Create Date: 2026-10-17 16:48:27.630915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b5a7c1f904'
+down_revision: Union[str, Sequence[str], None] = 'c4e8f1a9d276'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        # FTS5 de conteúdo externo sobre games.title; trigram = busca por substring (SQLite >= 3.34)
+        op.execute(
+            "CREATE VIRTUAL TABLE games_fts USING fts5("
+            "title, content='games', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            """
+            CREATE TRIGGER games_fts_ai AFTER INSERT ON games BEGIN
+                INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER games_fts_ad AFTER DELETE ON games BEGIN
+                INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER games_fts_au AFTER UPDATE OF title ON games BEGIN
+                INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title);
+            END
+            """
+        )
+        op.execute("INSERT INTO games_fts(games_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_games_title_trgm ON games USING gin (title gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS games_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS games_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS games_fts_ai")
+        op.execute("DROP TABLE IF EXISTS games_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_games_title_trgm")
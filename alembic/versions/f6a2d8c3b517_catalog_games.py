@@ -0,0 +1,40 @@
+"""catalog games mirror
+
+Revision ID: f6a2d8c3b517
+Revises: e3b5a7c1f904
+Create Date: 2026-10-17 17:52:44.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a2d8c3b517'
+down_revision: Union[str, Sequence[str], None] = 'e3b5a7c1f904'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Preenchida pelas buscas na CheapShark e pelo job: python -m jobs.sync_catalog
+    op.create_table('catalog_games',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('normalized_title', sa.String(), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('external_id')
+    )
+    op.create_index(op.f('ix_catalog_games_normalized_title'), 'catalog_games', ['normalized_title'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_catalog_games_normalized_title'), table_name='catalog_games')
+    op.drop_table('catalog_games')
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class RollupResolutionEnum(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
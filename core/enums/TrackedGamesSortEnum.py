@@ -0,0 +1,6 @@
+from enum import Enum
+
+class TrackedGamesSortEnum(str, Enum):
+    id = "id"
+    best_price = "best_price"
+    discount = "discount"
@@ -0,0 +1,23 @@
+import hashlib
+import json
+from typing import Iterable
+
+from schemas.game_data import GameData
+
+
+def deals_fingerprint(deals: Iterable[GameData]) -> str:
+    """Hash compacto do payload normalizado de deals de um jogo"""
+    normalized = sorted(
+        (
+            deal.deal_id or "",
+            deal.store_id or "",
+            round(deal.price, 2),
+            round(deal.original_price, 2) if deal.original_price is not None else None,
+            round(deal.discount_percentage, 2),
+            deal.is_on_sale,
+            deal.url or "",
+        )
+        for deal in deals
+    )
+    payload = json.dumps(normalized, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,21 @@
+from typing import Any, AsyncIterator, Optional, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """True quando o cliente pediu NDJSON no header Accept"""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+async def _lines(rows: AsyncIterator[Any], schema: Type[BaseModel]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield schema.model_validate(row).model_dump_json() + "\n"
+
+
+def ndjson_response(rows: AsyncIterator[Any], schema: Type[BaseModel]) -> StreamingResponse:
+    """Serializa cada linha com `schema` e envia conforme chega (um objeto JSON por linha)"""
+    return StreamingResponse(_lines(rows, schema), media_type=NDJSON_MEDIA_TYPE)
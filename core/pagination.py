@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+ItemType = TypeVar("ItemType")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado ou de outro endpoint"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não suportado em cursor: {type(value).__name__}")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Serializa a chave do último item da página em um cursor opaco"""
+    raw = json.dumps(list(values), default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    """
+    Decodifica um cursor aplicando um parser por posição da chave
+
+    Ex.: decode_cursor(cursor, int) ou decode_cursor(cursor, datetime.fromisoformat, int)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise InvalidCursorError("Cursor inválido")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+
+def paginate(
+        rows: List[ItemType],
+        limit: int,
+        key: Callable[[ItemType], Sequence[Any]]
+) -> Tuple[List[ItemType], Optional[str]]:
+    """
+    Corta as linhas buscadas com LIMIT limit + 1 e gera o cursor da próxima página
+
+    Returns:
+        Tuple[List, Optional[str]]: itens da página e cursor (None na última página)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
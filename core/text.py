@@ -0,0 +1,8 @@
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """Normaliza um título para comparação/chave de cache (caixa e espaços)"""
+    return _WHITESPACE.sub(" ", title).strip().casefold()
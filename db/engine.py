@@ -1,5 +1,5 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
 from dotenv import load_dotenv
 
@@ -10,23 +10,43 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
+# Drivers assíncronos usados pela aplicação (o Alembic continua com o driver síncrono)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Troca o driver da DATABASE_URL pelo equivalente assíncrono"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"Banco não suportado para acesso assíncrono: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# Pool por processo: API e worker (python -m worker) podem usar tamanhos diferentes
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
 engine_kwargs = {
     "echo": True,
-    "connect_args": {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
 }
 if not DATABASE_URL.startswith("sqlite"):
     engine_kwargs.update(
-        {"pool_size": 5, "max_overflow": 10, "pool_recycle": 3600}
+        {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_recycle": 3600}
     )
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_kwargs)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: objetos continuam legíveis após o commit sem novo SELECT
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autocommit=False, autoflush=False,
+                                  expire_on_commit=False)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+
+from db.Base import Base
+
+
+class CatalogGame(Base):
+    """Espelho local do catálogo da CheapShark (gameID e título) para resolver títulos sem a API"""
+    __tablename__ = "catalog_games"
+
+    id = Column(Integer, primary_key=True)
+    external_id = Column(String, unique=True, nullable=False)  # gameID da CheapShark
+    title = Column(String, nullable=False)
+    # core.text.normalize_title(title): chave da busca exata
+    normalized_title = Column(String, nullable=False, index=True)
+    image_url = Column(String, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), nullable=False)
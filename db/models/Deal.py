@@ -11,7 +11,7 @@ class Deal(Base):
         UniqueConstraint("deal_id", name="uq_deal_deal_id"),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False, index=True)
 
     deal_id = Column(String, nullable=False, index=True)
@@ -24,6 +24,8 @@ class Deal(Base):
     is_on_sale = Column(Boolean, nullable=False, default=False)
     url = Column(String, nullable=True)
     last_checked_at = Column(DateTime(timezone=True), nullable=True)
+    # Snapshot mais recente em price_history (desnormalizado, mantido pelo repositório)
+    last_history_id = Column(Integer, nullable=True)
 
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
@@ -33,3 +35,20 @@ class Deal(Base):
         back_populates="deal",
         cascade="all, delete-orphan"
     )
+    last_history = relationship(
+        "PriceHistory",
+        primaryjoin="Deal.last_history_id == PriceHistory.id",
+        foreign_keys=[last_history_id],
+        uselist=False,
+        viewonly=True
+    )
+    daily_prices = relationship(
+        "PriceHistoryDaily",
+        back_populates="deal",
+        cascade="all, delete-orphan"
+    )
+    alerts = relationship(
+        "PriceAlert",
+        back_populates="deal",
+        cascade="all, delete-orphan"
+    )
@@ -8,11 +8,22 @@ from db.Base import Base
 class Game(Base):
     __tablename__ = "games"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     external_id = Column(String, unique=True, index=True, nullable=False)
     title = Column(String, nullable=False, index=True)
     image_url = Column(String, nullable=True)
 
+    # Hash do último payload de deals processado pelo monitor (None = reprocessar)
+    deals_fingerprint = Column(String, nullable=True)
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)
+    # Próxima verificação do monitor (ver services/monitor_scheduler.py)
+    next_check_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     deals = relationship(
@@ -20,3 +31,9 @@ class Game(Base):
         back_populates="game",
         cascade="all, delete-orphan"
     )
+    price_summary = relationship(
+        "GamePriceSummary",
+        back_populates="game",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from db.Base import Base
+
+
+class GamePriceSummary(Base):
+    """Resumo de preço por jogo, mantido na mesma transação que grava os deals"""
+    __tablename__ = "game_price_summary"
+
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+
+    # Deal mais barato entre as lojas (None = jogo sem deals)
+    best_price = Column(Float, nullable=True)
+    best_deal_id = Column(String, nullable=True)
+    best_store_name = Column(String, nullable=True)
+    max_discount_percent = Column(Float, nullable=True)
+    deal_count = Column(Integer, nullable=False, default=0)
+
+    # Menor best_price já registrado
+    all_time_low = Column(Float, nullable=True)
+    all_time_low_at = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Índices das listagens ordenadas (/games/tracked?sort=...)
+    __table_args__ = (
+        Index("ix_game_price_summary_best_price", best_price, game_id),
+        Index("ix_game_price_summary_max_discount", max_discount_percent.desc(), game_id),
+    )
+
+    game = relationship("Game", back_populates="price_summary")
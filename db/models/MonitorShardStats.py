@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+
+from db.Base import Base
+
+
+class MonitorShardStats(Base):
+    """Totais acumulados do monitor por shard (um processo líder grava cada linha)"""
+    __tablename__ = "monitor_shard_stats"
+
+    shard_index = Column(Integer, primary_key=True)
+    shard_count = Column(Integer, nullable=False)
+
+    ticks = Column(Integer, nullable=False, default=0)
+    games_checked = Column(Integer, nullable=False, default=0)
+    games_unchanged = Column(Integer, nullable=False, default=0)
+    deals_updated = Column(Integer, nullable=False, default=0)
+    new_sales = Column(Integer, nullable=False, default=0)
+    price_drops = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Float, nullable=False, default=0.0)
+
+    last_tick_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship, synonym
 from datetime import datetime, timezone
 
 from db.Base import Base
@@ -8,11 +8,19 @@ from db.Base import Base
 class PriceHistory(Base):
     __tablename__ = "price_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False)
 
     price = Column(Float, nullable=False)
     discount_percent = Column(Float, nullable=True)
     checked_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Intervalo [checked_at, valid_to]: preço visto da primeira à última verificação sem mudança
+    valid_to = Column(DateTime(timezone=True), nullable=True)
+    valid_from = synonym("checked_at")
 
     deal = relationship("Deal", back_populates="price_history")
+
+    # Cobre filtro por deal + ordenação por data (e buscas só por deal_id)
+    __table_args__ = (
+        Index("ix_price_history_deal_id_checked_at", deal_id, checked_at.desc()),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from db.Base import Base
+
+
+class PriceHistoryDaily(Base):
+    """Rollup diário (OHLC) dos snapshots de price_history de um deal"""
+    __tablename__ = "price_history_daily"
+    __table_args__ = (
+        UniqueConstraint("deal_id", "day", name="uq_price_history_daily_deal_day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False)
+    day = Column(Date, nullable=False)  # dia em UTC
+
+    open_price = Column(Float, nullable=False)
+    high_price = Column(Float, nullable=False)
+    low_price = Column(Float, nullable=False)
+    close_price = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+    max_discount_percent = Column(Float, nullable=True)
+
+    # Limites do dia usados para decidir open/close nos merges incrementais
+    first_checked_at = Column(DateTime(timezone=True), nullable=False)
+    last_checked_at = Column(DateTime(timezone=True), nullable=False)
+
+    deal = relationship("Deal", back_populates="daily_prices")
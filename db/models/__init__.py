@@ -1,5 +1,10 @@
 from db.models.Game import Game
 from db.models.Deal import Deal
 from db.models.PriceHistory import PriceHistory
+from db.models.PriceAlert import PriceAlert
+from db.models.PriceHistoryDaily import PriceHistoryDaily
+from db.models.GamePriceSummary import GamePriceSummary
+from db.models.CatalogGame import CatalogGame
+from db.models.MonitorShardStats import MonitorShardStats
 
-__all__ = ["Game", "Deal", "PriceHistory"]
+__all__ = ["Game", "Deal", "PriceHistory", "PriceAlert", "PriceHistoryDaily", "GamePriceSummary", "CatalogGame", "MonitorShardStats"]
@@ -0,0 +1,25 @@
+# db/search_index.py
+"""
+Índices de busca por título de games, criados por migration com DDL de cada dialeto
+
+- SQLite: tabela virtual FTS5 (tokenizer trigram) mantida por triggers
+- Postgres: índice GIN com pg_trgm em games.title
+
+Ficam fora do metadata, então o autogenerate do Alembic precisa ignorá-los.
+"""
+from sqlalchemy import column, table
+
+GAMES_FTS_TABLE = "games_fts"
+GAMES_TITLE_TRGM_INDEX = "ix_games_title_trgm"
+
+# Tabela FTS5 de conteúdo externo: rowid = games.id; rank = bm25 (menor é melhor)
+games_fts = table(GAMES_FTS_TABLE, column("rowid"), column("title"), column("rank"))
+
+
+def is_search_index(name: str, type_: str) -> bool:
+    """True para objetos de busca (inclui as tabelas-sombra do FTS5, games_fts_*)"""
+    if type_ == "table":
+        return name == GAMES_FTS_TABLE or name.startswith(f"{GAMES_FTS_TABLE}_")
+    if type_ == "index":
+        return name == GAMES_TITLE_TRGM_INDEX
+    return False
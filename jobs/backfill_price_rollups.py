@@ -0,0 +1,72 @@
+# jobs/backfill_price_rollups.py
+"""
+Reconstrói price_history_daily a partir de todo o price_history
+
+Uso: python -m jobs.backfill_price_rollups
+
+Execução única (ex.: logo após a migration). Os rollups são apagados e
+recalculados em lotes com commit por lote, então rode com o monitor parado
+para não contar snapshots novos em dobro.
+
+Cada intervalo de price_history entra como dois pontos (início e valid_to);
+verificações intermediárias sem mudança não ficam gravadas, então o
+sample_count reconstruído é menor que o mantido incrementalmente.
+"""
+import asyncio
+import logging
+import os
+from typing import Iterator, List
+
+from db.engine import SessionLocal, engine
+from db.models import PriceHistory
+from db.unit_of_work import unit_of_work
+from repositories.price_history_repository import PriceHistoryRepository
+from repositories.price_history_daily_repository import PriceHistoryDailyRepository, Snapshot
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = int(os.getenv("ROLLUP_BACKFILL_BATCH_SIZE", "1000"))
+
+
+def _interval_points(rows: List[PriceHistory]) -> Iterator[Snapshot]:
+    for row in rows:
+        yield row.deal_id, row.price, row.discount_percent, row.valid_from
+        if row.valid_to and row.valid_to != row.valid_from:
+            yield row.deal_id, row.price, row.discount_percent, row.valid_to
+
+
+async def backfill_price_rollups(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Recalcula todos os rollups diários; retorna quantos snapshots foram lidos"""
+    processed = 0
+    async with SessionLocal() as db:
+        history = PriceHistoryRepository(db, autocommit=False)
+        rollups = PriceHistoryDailyRepository(db, autocommit=False)
+        async with unit_of_work(db):
+            await rollups.clear()
+
+        # Keyset por id: o merge dos rollups não depende da ordem dos snapshots
+        after_id = None
+        while True:
+            async with unit_of_work(db):
+                rows = await history.get_page(batch_size, after_id)
+                if not rows:
+                    break
+                await rollups.add_snapshots(_interval_points(rows))
+            after_id = rows[-1].id
+            processed += len(rows)
+            logger.info(f"Rollups: {processed} snapshots processados")
+
+    return processed
+
+
+async def _main() -> None:
+    try:
+        processed = await backfill_price_rollups()
+        logger.info(f"Backfill de rollups concluído: {processed} snapshots")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
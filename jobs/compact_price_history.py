@@ -0,0 +1,224 @@
+# jobs/compact_price_history.py
+"""
+Retenção e compactação de price_history
+
+Uso: python -m jobs.compact_price_history
+
+1. Intervalos mais antigos que HISTORY_RETENTION_DAYS viram um por dia (UTC),
+   mantendo o preço de fechamento do dia (o OHLC completo fica nos rollups).
+2. Intervalos consecutivos com o mesmo preço e desconto são fundidos.
+3. As remoções são feitas em lotes de HISTORY_COMPACTION_BATCH_SIZE linhas,
+   uma transação por lote.
+
+Pode rodar junto com o monitor: o intervalo aberto de cada deal (o único que
+o monitor altera) nunca é removido, só tem o início estendido.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.engine import SessionLocal, engine
+from db.unit_of_work import unit_of_work
+from repositories.deal_repository import DealRepository
+from repositories.price_history_repository import PriceHistoryRepository
+from repositories.price_history_daily_repository import utc_day
+
+logger = logging.getLogger(__name__)
+
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+HISTORY_COMPACTION_BATCH_SIZE = int(os.getenv("HISTORY_COMPACTION_BATCH_SIZE", "1000"))
+# Deals lidos por página durante a varredura
+COMPACTION_DEALS_PER_PAGE = 100
+
+
+@dataclass
+class CompactionResult:
+    deals_scanned: int = 0
+    rows_scanned: int = 0
+    rows_downsampled: int = 0
+    rows_collapsed: int = 0
+    duration_seconds: float = 0.0
+
+    @property
+    def rows_removed(self) -> int:
+        return self.rows_downsampled + self.rows_collapsed
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devolve datetimes sem tzinfo, já em UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _merge(segments: List[dict], keep: dict) -> dict:
+    """Funde segmentos consecutivos em `keep`, cobrindo do primeiro início ao último fim"""
+    keep["checked_at"] = segments[0]["checked_at"]
+    keep["valid_to"] = max((segment["valid_to"] for segment in segments), key=_as_utc)
+    return keep
+
+
+def plan_compaction(
+        rows: List[Row],
+        protected_ids: set,
+        cutoff: datetime
+) -> Tuple[Dict[int, dict], List[int], int]:
+    """
+    Calcula a compactação de um deal sem tocar no banco
+
+    Returns:
+        (limites novos por id, ids a remover, quantos desses vieram do downsample)
+    """
+    segments = [
+        {
+            "id": row.id,
+            "price": row.price,
+            "discount_percent": row.discount_percent,
+            "checked_at": row.checked_at,
+            "valid_to": row.valid_to or row.checked_at,
+        }
+        for row in rows
+    ]
+    removed: List[int] = []
+
+    # 1. Downsample: intervalos antigos ficam um por dia (o último do dia)
+    downsampled: List[dict] = []
+    day_group: List[dict] = []
+
+    def flush_day() -> None:
+        if len(day_group) > 1:
+            downsampled.append(_merge(day_group, day_group[-1]))
+            removed.extend(segment["id"] for segment in day_group[:-1])
+        else:
+            downsampled.extend(day_group)
+        day_group.clear()
+
+    for segment in segments:
+        is_old = _as_utc(segment["valid_to"]) < cutoff and segment["id"] not in protected_ids
+        if is_old and day_group and utc_day(day_group[0]["checked_at"]) == utc_day(segment["checked_at"]):
+            day_group.append(segment)
+            continue
+        flush_day()
+        if is_old:
+            day_group.append(segment)
+        else:
+            downsampled.append(segment)
+    flush_day()
+    downsampled_count = len(removed)
+
+    # 2. Colapsa intervalos consecutivos idênticos (mantém o protegido, se houver)
+    compacted: List[dict] = []
+    run: List[dict] = []
+
+    def flush_run() -> None:
+        if len(run) > 1:
+            keep = next((segment for segment in run if segment["id"] in protected_ids), run[0])
+            compacted.append(_merge(run, keep))
+            removed.extend(segment["id"] for segment in run if segment is not keep)
+        else:
+            compacted.extend(run)
+        run.clear()
+
+    for segment in downsampled:
+        if run and (run[-1]["price"], run[-1]["discount_percent"]) != (segment["price"], segment["discount_percent"]):
+            flush_run()
+        run.append(segment)
+    flush_run()
+
+    original = {row.id: (row.checked_at, row.valid_to) for row in rows}
+    bounds: Dict[int, dict] = {}
+    for segment in compacted:
+        if (segment["checked_at"], segment["valid_to"]) == original[segment["id"]]:
+            continue
+        if segment["id"] in protected_ids:
+            # valid_to do intervalo aberto é do monitor: só o início é recuado
+            bounds[segment["id"]] = {"id": segment["id"], "checked_at": segment["checked_at"]}
+        else:
+            bounds[segment["id"]] = {"id": segment["id"], "checked_at": segment["checked_at"], "valid_to": segment["valid_to"]}
+    return bounds, removed, downsampled_count
+
+
+async def _apply(db: AsyncSession, history: PriceHistoryRepository, bounds: Dict[int, dict],
+                 removed: List[int], batch_size: int) -> None:
+    # Estende os intervalos mantidos antes de remover os absorvidos
+    async with unit_of_work(db):
+        await history.set_bounds([bound for bound in bounds.values() if "valid_to" in bound])
+        await history.set_bounds([bound for bound in bounds.values() if "valid_to" not in bound])
+    for start in range(0, len(removed), batch_size):
+        async with unit_of_work(db):
+            await history.delete_by_ids(removed[start:start + batch_size])
+
+
+async def compact_price_history(
+        retention_days: Optional[int] = None,
+        batch_size: Optional[int] = None
+) -> CompactionResult:
+    """Executa uma passada completa de compactação sobre todos os deals"""
+    retention_days = HISTORY_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or HISTORY_COMPACTION_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    started = time.monotonic()
+    result = CompactionResult()
+
+    async with SessionLocal() as db:
+        deals = DealRepository(db, autocommit=False)
+        history = PriceHistoryRepository(db, autocommit=False)
+
+        bounds: Dict[int, dict] = {}
+        removed: List[int] = []
+        after_id = None
+        while True:
+            page = [(deal.id, deal.last_history_id) for deal in await deals.get_page(COMPACTION_DEALS_PER_PAGE, after_id)]
+            if not page:
+                break
+            after_id = page[-1][0]
+
+            for deal_id, last_history_id in page:
+                rows = await history.get_intervals_by_deal(deal_id)
+                result.deals_scanned += 1
+                result.rows_scanned += len(rows)
+                if len(rows) < 2:
+                    continue
+
+                # O intervalo aberto (ponteiro e último por data) é o que o monitor altera
+                protected = {last_history_id, rows[-1].id}
+                deal_bounds, deal_removed, downsampled = plan_compaction(rows, protected, cutoff)
+                bounds.update(deal_bounds)
+                removed.extend(deal_removed)
+                result.rows_downsampled += downsampled
+                result.rows_collapsed += len(deal_removed) - downsampled
+
+                if len(removed) >= batch_size:
+                    await _apply(db, history, bounds, removed, batch_size)
+                    bounds, removed = {}, []
+
+            # Encerra a transação de leitura da página antes de seguir
+            await db.commit()
+
+        await _apply(db, history, bounds, removed, batch_size)
+
+    result.duration_seconds = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Compactação de price_history: {result.deals_scanned} deals, "
+        f"{result.rows_scanned} linhas lidas, {result.rows_removed} removidas "
+        f"({result.rows_downsampled} downsample, {result.rows_collapsed} repetidas) "
+        f"em {result.duration_seconds}s"
+    )
+    return result
+
+
+async def _main() -> None:
+    try:
+        await compact_price_history()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
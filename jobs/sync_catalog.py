@@ -0,0 +1,79 @@
+# jobs/sync_catalog.py
+"""
+Sincroniza o catálogo local (catalog_games) com a CheapShark
+
+Uso: python -m jobs.sync_catalog
+
+Copia os jogos já rastreados e percorre a listagem de deals da CheapShark
+(até CATALOG_SYNC_MAX_PAGES páginas), gravando gameID e título. A busca por
+título (lookup/track) consulta esse catálogo antes de chamar a API.
+"""
+import asyncio
+import logging
+import os
+
+from db.engine import SessionLocal, engine
+from db.unit_of_work import unit_of_work
+from repositories.catalog_game_repository import CatalogGameRepository
+from repositories.game_repository import GameRepository
+from services.cheap_shark_service import CheapSharkService
+from services.http_client import create_http_client
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SYNC_MAX_PAGES = int(os.getenv("CATALOG_SYNC_MAX_PAGES", "50"))
+# Jogos rastreados lidos por página ao copiar a tabela games
+CATALOG_SYNC_BATCH_SIZE = 1000
+
+
+async def sync_catalog(max_pages: int = CATALOG_SYNC_MAX_PAGES) -> int:
+    """Atualiza o catálogo; retorna quantas entradas foram processadas"""
+    synced = 0
+    async with SessionLocal() as db:
+        catalog = CatalogGameRepository(db, autocommit=False)
+        games = GameRepository(db, autocommit=False)
+
+        # Jogos rastreados já têm gameID e título confiáveis
+        after_id = None
+        while True:
+            async with unit_of_work(db):
+                page = await games.get_page(CATALOG_SYNC_BATCH_SIZE, after_id)
+                if not page:
+                    break
+                synced += await catalog.upsert_many((game.external_id, game.title, game.image_url) for game in page)
+            after_id = page[-1].id
+
+        http_client = create_http_client()
+        try:
+            cheapshark = CheapSharkService(http_client)
+            page_number = 0
+            while page_number < max_pages:
+                # Chamada à API fora da transação
+                results, total_pages = await cheapshark.get_catalog_page(page_number)
+                if not results:
+                    break
+                async with unit_of_work(db):
+                    synced += await catalog.upsert_many(
+                        (result.game_id, result.title, result.image_url) for result in results
+                    )
+                page_number += 1
+                logger.info(f"Catálogo: página {page_number}/{min(total_pages, max_pages)}")
+                if page_number >= total_pages:
+                    break
+        finally:
+            await http_client.aclose()
+
+    return synced
+
+
+async def _main() -> None:
+    try:
+        synced = await sync_catalog()
+        logger.info(f"Sync do catálogo concluído: {synced} entradas processadas")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -1,37 +1,37 @@
 # main.py
-import asyncio
 import os
-import contextlib
-from fastapi import FastAPI
+import httpx
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from db.engine import SessionLocal
+from core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError
+from db.engine import engine
 import db.models  # noqa: F401
 from routes import tracked_games_routes
-from services.game_aggregator_service import GameAggregatorService
+from services.monitor_runner import MonitorRunner
+from services.http_client import create_http_client
 from schemas.responses import RootResponse
 
+# false quando o monitor roda no worker dedicado (python -m worker)
+MONITOR_IN_APP = os.getenv("MONITOR_IN_APP", "true").lower() in ("1", "true", "yes")
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    interval_seconds = int(os.getenv("PRICE_UPDATE_INTERVAL_SECONDS", "1800"))
-
-    async def price_update_loop():
-        while True:
-            db = SessionLocal()
-            try:
-                service = GameAggregatorService(db)
-                await service.update_all_tracked_deals()
-            finally:
-                db.close()
-            await asyncio.sleep(interval_seconds)
-
-    task = asyncio.create_task(price_update_loop())
+    http_client = create_http_client()
+    _app.state.http_client = http_client
+    # Com vários workers (uvicorn/gunicorn) só o líder roda os loops em background
+    runner = MonitorRunner(http_client) if MONITOR_IN_APP else None
+    if runner:
+        runner.start()
     try:
         yield
     finally:
-        task.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            await task
+        if runner:
+            await runner.stop()
+        await http_client.aclose()
+        await engine.dispose()
 
 app = FastAPI(
     title="Game Price Tracker API",
@@ -47,10 +47,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(tracked_games_routes.router)
 
+
+@app.exception_handler(httpx.HTTPError)
+async def upstream_error_handler(_request: Request, _exc: httpx.HTTPError):
+    # CheapShark fora do ar ou limitando mesmo após as retentativas
+    return JSONResponse(status_code=502, content={"detail": "CheapShark upstream error"})
+
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(_request: Request, _exc: InvalidCursorError):
+    return JSONResponse(status_code=400, content={"detail": "Invalid pagination cursor"})
+
+
 @app.get("/", response_model=RootResponse)
 def read_root():
     return RootResponse(
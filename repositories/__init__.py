@@ -1,5 +1,9 @@
 from repositories.game_repository import GameRepository
 from repositories.deal_repository import DealRepository
 from repositories.price_history_repository import PriceHistoryRepository
+from repositories.price_alert_repository import PriceAlertRepository
+from repositories.price_history_daily_repository import PriceHistoryDailyRepository
+from repositories.game_price_summary_repository import GamePriceSummaryRepository
+from repositories.catalog_game_repository import CatalogGameRepository
 
-__all__ = ["GameRepository", "DealRepository", "PriceHistoryRepository"]
+__all__ = ["GameRepository", "DealRepository", "PriceHistoryRepository", "PriceAlertRepository", "PriceHistoryDailyRepository", "GamePriceSummaryRepository", "CatalogGameRepository"]
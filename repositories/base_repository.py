@@ -1,42 +1,91 @@
 # repositories/base_repository.py
-from typing import Generic, TypeVar, Type, Optional, List
-from sqlalchemy.orm import Session
+import os
+from typing import AsyncIterator, Generic, TypeVar, Type, Optional, List
+from sqlalchemy import Insert, Select, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.Base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+# Linhas buscadas por vez nas consultas em streaming
+STREAM_YIELD_PER = int(os.getenv("STREAM_YIELD_PER", "500"))
+
+# insert() com ON CONFLICT dos bancos aceitos por db/engine.py
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 class BaseRepository(Generic[ModelType]):
-    def __init__(self, model: Type[ModelType], db: Session):
+    def __init__(self, model: Type[ModelType], db: AsyncSession, autocommit: bool = True):
         self.model = model
         self.db = db
+        # autocommit=False: o chamador controla a transação (ver db.unit_of_work)
+        self.autocommit = autocommit
+
+    async def _commit(self) -> None:
+        """Confirma a escrita; em unit of work apenas faz flush (gera IDs)"""
+        if self.autocommit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
+
+    @property
+    def _dialect(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def _insert(self) -> Insert:
+        """INSERT na tabela do modelo com o dialeto da sessão (suporta on_conflict_do_update)"""
+        if self._dialect not in DIALECT_INSERTS:
+            raise RuntimeError(f"Banco não suportado para upsert: {self._dialect}")
+        return DIALECT_INSERTS[self._dialect](self.model)
+
+    async def get_by_id(self, entity_id: int) -> Optional[ModelType]:
+        return await self.db.get(self.model, entity_id)
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        result = await self.db.scalars(select(self.model).offset(skip).limit(limit))
+        return list(result.all())
+
+    async def get_page(self, limit: int, after_id: Optional[int] = None, skip: int = 0) -> List[ModelType]:
+        """Página ordenada por id; com `after_id` usa keyset em vez de OFFSET"""
+        result = await self.db.scalars(self._paginate(select(self.model), limit, after_id, skip))
+        return list(result.all())
 
-    def get_by_id(self, entity_id: int) -> Optional[ModelType]:
-        return self.db.query(self.model).filter(self.model.id == entity_id).first()  # type: ignore
+    def _paginate(self, stmt: Select, limit: int, after_id: Optional[int] = None, skip: int = 0) -> Select:
+        # Custo constante por página: WHERE id > :after usa a PK; OFFSET só por compatibilidade
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        elif skip:
+            stmt = stmt.offset(skip)
+        return stmt.order_by(self.model.id).limit(limit)
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        return self.db.query(self.model).offset(skip).limit(limit).all()
+    async def _stream(self, stmt: Select) -> AsyncIterator[ModelType]:
+        """Itera o resultado em lotes de STREAM_YIELD_PER sem materializar tudo"""
+        result = await self.db.stream_scalars(stmt.execution_options(yield_per=STREAM_YIELD_PER))
+        async for row in result:
+            yield row
 
-    def create(self, obj_in: dict) -> ModelType:
+    async def create(self, obj_in: dict) -> ModelType:
         db_obj = self.model(**obj_in)
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        await self._commit()
         return db_obj
 
-    def update(self, entity_id: int, obj_in: dict) -> Optional[ModelType]:
-        db_obj = self.get_by_id(entity_id)
+    async def update(self, entity_id: int, obj_in: dict) -> Optional[ModelType]:
+        db_obj = await self.get_by_id(entity_id)
         if db_obj:
             for key, value in obj_in.items():
                 setattr(db_obj, key, value)
-            self.db.commit()
-            self.db.refresh(db_obj)
+            await self._commit()
         return db_obj
 
-    def delete(self, entity_id: int) -> bool:
-        db_obj = self.get_by_id(entity_id)
+    async def delete(self, entity_id: int) -> bool:
+        db_obj = await self.get_by_id(entity_id)
         if db_obj:
-            self.db.delete(db_obj)
-            self.db.commit()
+            await self.db.delete(db_obj)
+            await self._commit()
             return True
         return False
\ No newline at end of file
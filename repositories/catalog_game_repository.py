@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.text import normalize_title
+from db.models.CatalogGame import CatalogGame
+from repositories.base_repository import BaseRepository
+
+# (gameID, título, image_url)
+CatalogEntry = Tuple[str, str, Optional[str]]
+
+# Linhas por statement de upsert
+CATALOG_UPSERT_BATCH_SIZE = 500
+
+
+class CatalogGameRepository(BaseRepository[CatalogGame]):
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(CatalogGame, db, autocommit)
+
+    async def get_by_title(self, title: str) -> Optional[CatalogGame]:
+        """Busca exata pelo título normalizado (caixa e espaços), usando o índice"""
+        return await self.db.scalar(
+            select(self.model)
+            .where(self.model.normalized_title == normalize_title(title))
+            .order_by(self.model.id)
+            .limit(1)
+        )
+
+    async def upsert_many(self, entries: Iterable[CatalogEntry]) -> int:
+        """
+        Insere ou atualiza jogos do catálogo com ON CONFLICT (external_id) DO UPDATE
+
+        Returns:
+            int: quantidade de entradas enviadas no upsert
+        """
+        now = datetime.now(timezone.utc)
+        payloads = list({
+            external_id: {
+                "external_id": external_id,
+                "title": title,
+                "normalized_title": normalize_title(title),
+                "image_url": image_url,
+                "updated_at": now,
+            }
+            for external_id, title, image_url in entries
+            if external_id and title
+        }.values())
+        if not payloads:
+            return 0
+
+        for start in range(0, len(payloads), CATALOG_UPSERT_BATCH_SIZE):
+            stmt = self._insert().values(payloads[start:start + CATALOG_UPSERT_BATCH_SIZE])
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[self.model.external_id],
+                set_={key: excluded[key] for key in ("title", "normalized_title", "image_url", "updated_at")},
+                # Entradas sem mudança não reescrevem a linha (buscas repetidas são o caso comum)
+                where=or_(
+                    self.model.title != excluded.title,
+                    self.model.image_url.is_distinct_from(excluded.image_url),
+                ),
+            )
+            await self.db.execute(stmt)
+
+        await self._commit()
+        return len(payloads)
@@ -1,24 +1,89 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Optional, List, Dict, Iterable, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.models.Deal import Deal
+from db.models.PriceHistory import PriceHistory
 from repositories.base_repository import BaseRepository
 
+# Linhas por statement de upsert (11 colunas -> ~5.500 parâmetros por lote)
+UPSERT_BATCH_SIZE = 500
+
 
 class DealRepository(BaseRepository[Deal]):
-    def __init__(self, db: Session):
-        super().__init__(Deal, db)
-
-    def get_by_deal_id(self, deal_id: str) -> Optional[Deal]:
-        return self.db.query(self.model).filter(
-            self.model.deal_id == deal_id
-        ).first()  # type: ignore
-
-    def get_by_game(self, game_id: int) -> List[Deal]:
-        return self.db.query(self.model).filter(
-            self.model.game_id == game_id
-        ).all()  # type: ignore
-
-    def get_on_sale(self) -> List[Deal]:
-        return self.db.query(self.model).filter(
-            self.model.is_on_sale
-        ).all()  # type: ignore
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(Deal, db, autocommit)
+
+    async def get_by_deal_id(self, deal_id: str) -> Optional[Deal]:
+        return await self.db.scalar(
+            select(self.model).where(self.model.deal_id == deal_id).limit(1)
+        )
+
+    async def get_by_deal_ids(self, deal_ids: Iterable[str]) -> List[Deal]:
+        result = await self.db.scalars(
+            select(self.model).where(self.model.deal_id.in_(list(deal_ids)))
+        )
+        return list(result.all())
+
+    async def get_with_latest_history(self, deal_ids: Iterable[str]) -> List[Tuple[Deal, Optional[PriceHistory]]]:
+        """Carrega deals junto com o snapshot mais recente de cada um em uma única query"""
+        deal_ids = list(deal_ids)
+        if not deal_ids:
+            return []
+
+        result = await self.db.execute(
+            select(self.model, PriceHistory)
+            .outerjoin(PriceHistory, PriceHistory.id == self.model.last_history_id)
+            .where(self.model.deal_id.in_(deal_ids))
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def upsert_many(self, payloads: List[dict]) -> Dict[str, int]:
+        """
+        Insere ou atualiza deals em lote com INSERT ... ON CONFLICT (deal_id) DO UPDATE
+
+        Um statement por lote de UPSERT_BATCH_SIZE linhas (SQLite e Postgres).
+        Todos os payloads devem ter as mesmas chaves.
+
+        Returns:
+            Dict[str, int]: deal_id (CheapShark) -> id da linha
+        """
+        # Postgres rejeita a mesma linha duas vezes no mesmo ON CONFLICT: último payload vence
+        unique_payloads = list({payload["deal_id"]: payload for payload in payloads}.values())
+        if not unique_payloads:
+            return {}
+
+        ids: Dict[str, int] = {}
+        for start in range(0, len(unique_payloads), UPSERT_BATCH_SIZE):
+            batch = unique_payloads[start:start + UPSERT_BATCH_SIZE]
+            stmt = self._insert().values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[self.model.deal_id],
+                set_={key: stmt.excluded[key] for key in batch[0] if key != "deal_id"},
+            ).returning(self.model.id, self.model.deal_id)
+
+            for row in await self.db.execute(stmt):
+                ids[row.deal_id] = row.id
+
+        await self._commit()
+        return ids
+
+    async def get_by_game(self, game_id: int) -> List[Deal]:
+        result = await self.db.scalars(
+            select(self.model).where(self.model.game_id == game_id)
+        )
+        return list(result.all())
+
+    async def get_on_sale(self) -> List[Deal]:
+        result = await self.db.scalars(
+            select(self.model).where(self.model.is_on_sale)
+        )
+        return list(result.all())
+
+    def stream_on_sale(self) -> AsyncIterator[Deal]:
+        return self._stream(select(self.model).where(self.model.is_on_sale).order_by(self.model.id))
+
+    async def get_on_sale_page(self, limit: int, after_id: Optional[int] = None, skip: int = 0) -> List[Deal]:
+        result = await self.db.scalars(
+            self._paginate(select(self.model).where(self.model.is_on_sale), limit, after_id, skip)
+        )
+        return list(result.all())
@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.Deal import Deal
+from db.models.GamePriceSummary import GamePriceSummary
+from repositories.base_repository import BaseRepository
+
+
+class GamePriceSummaryRepository(BaseRepository[GamePriceSummary]):
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(GamePriceSummary, db, autocommit)
+
+    async def refresh(self, game_ids: Iterable[int]) -> None:
+        """
+        Recalcula o resumo dos jogos a partir dos deals gravados (upsert por lote)
+
+        Deve rodar na mesma transação que alterou os deals, depois do flush.
+        O all-time low só desce: é o mínimo entre o valor gravado e o best_price atual.
+        """
+        game_ids = set(game_ids)
+        if not game_ids:
+            return
+
+        now = datetime.now(timezone.utc)
+        summaries: Dict[int, dict] = {
+            game_id: {
+                "game_id": game_id,
+                "best_price": None,
+                "best_deal_id": None,
+                "best_store_name": None,
+                "max_discount_percent": None,
+                "deal_count": 0,
+                "all_time_low": None,
+                "all_time_low_at": None,
+                "updated_at": now,
+            }
+            for game_id in game_ids
+        }
+
+        result = await self.db.execute(
+            select(Deal.game_id, Deal.deal_id, Deal.store_name, Deal.current_price, Deal.discount_percentage)
+            .where(Deal.game_id.in_(game_ids))
+            .order_by(Deal.game_id, Deal.current_price, Deal.id)
+        )
+        for row in result:
+            summary = summaries[row.game_id]
+            if summary["deal_count"] == 0:
+                # Ordenado por preço: a primeira linha do jogo é o melhor deal
+                summary.update({
+                    "best_price": row.current_price,
+                    "best_deal_id": row.deal_id,
+                    "best_store_name": row.store_name,
+                    "all_time_low": row.current_price,
+                    "all_time_low_at": now,
+                })
+            summary["deal_count"] += 1
+            current = summary["max_discount_percent"]
+            summary["max_discount_percent"] = (
+                row.discount_percentage if current is None else max(current, row.discount_percentage)
+            )
+
+        table = self.model
+        stmt = self._insert().values(list(summaries.values()))
+        excluded = stmt.excluded
+        new_low = or_(
+            table.all_time_low.is_(None),
+            excluded.all_time_low < table.all_time_low,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.game_id],
+            set_={
+                "best_price": excluded.best_price,
+                "best_deal_id": excluded.best_deal_id,
+                "best_store_name": excluded.best_store_name,
+                "max_discount_percent": excluded.max_discount_percent,
+                "deal_count": excluded.deal_count,
+                "all_time_low": case(
+                    (new_low, func.coalesce(excluded.all_time_low, table.all_time_low)),
+                    else_=table.all_time_low,
+                ),
+                "all_time_low_at": case(
+                    (new_low, func.coalesce(excluded.all_time_low_at, table.all_time_low_at)),
+                    else_=table.all_time_low_at,
+                ),
+                "updated_at": excluded.updated_at,
+            },
+        )
+        await self.db.execute(stmt)
+        await self._commit()
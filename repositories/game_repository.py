@@ -1,28 +1,184 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from typing import Dict, Optional, List, Iterable, Tuple
+from sqlalchemy import and_, case, func, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, selectinload
+from core.enums.TrackedGamesSortEnum import TrackedGamesSortEnum
+from db.models.Deal import Deal
 from db.models.Game import Game
+from db.models.GamePriceSummary import GamePriceSummary
+from db.models.PriceHistory import PriceHistory
+from db.search_index import GAMES_FTS_TABLE, games_fts
 from repositories.base_repository import BaseRepository
 
+# Trigramas precisam de ao menos 3 caracteres para usar o índice
+SEARCH_MIN_TRIGRAM_LENGTH = 3
+
 
 class GameRepository(BaseRepository[Game]):
-    def __init__(self, db: Session):
-        super().__init__(Game, db)
-
-    def get_by_external_id(self, external_id: str) -> Optional[Game]:
-        return self.db.query(self.model).filter(
-            self.model.external_id == external_id
-        ).first()  # type: ignore
-
-    def search_by_title(self, title: str, limit: int = 10) -> List[Game]:
-        return self.db.query(self.model).filter(
-            self.model.title.ilike(f"%{title}%")
-        ).limit(limit).all()  # type: ignore
-
-    def get_all_with_deals(self, skip: int = 0, limit: int = 100) -> List[Game]:
-        return (
-            self.db.query(self.model)
-            .options(joinedload(self.model.deals))
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(Game, db, autocommit)
+
+    async def get_by_external_id(self, external_id: str) -> Optional[Game]:
+        return await self.db.scalar(
+            select(self.model).where(self.model.external_id == external_id).limit(1)
+        )
+
+    async def get_by_ids(self, ids: Iterable[int]) -> List[Game]:
+        result = await self.db.scalars(
+            select(self.model).where(self.model.id.in_(list(ids)))
+        )
+        return list(result.all())
+
+    async def clear_fingerprints(self, ids: Iterable[int]) -> None:
+        """Invalida o fingerprint de deals para o monitor reprocessar os jogos"""
+        ids = list(ids)
+        if not ids:
+            return
+        await self.db.execute(
+            update(self.model).where(self.model.id.in_(ids)).values(deals_fingerprint=None),
+            execution_options={"synchronize_session": False},
+        )
+        await self._commit()
+
+    async def get_due(self, now: datetime, limit: int, shard_index: int = 0, shard_count: int = 1) -> List[Game]:
+        """
+        Jogos com verificação vencida, mais atrasados primeiro (índice em next_check_at)
+
+        Com shard_count > 1 só devolve os jogos com id % shard_count == shard_index,
+        então workers com índices diferentes nunca verificam o mesmo jogo.
+        """
+        stmt = select(self.model).where(self.model.next_check_at <= now)
+        if shard_count > 1:
+            stmt = stmt.where(self.model.id % shard_count == shard_index)
+        result = await self.db.scalars(
+            stmt.order_by(self.model.next_check_at, self.model.id).limit(limit)
         )
+        return list(result.all())
+
+    async def get_activity(
+            self,
+            ids: Iterable[int],
+            since: datetime
+    ) -> Dict[int, Tuple[int, bool, Optional[datetime]]]:
+        """
+        Sinais de agendamento por jogo em uma única query
+
+        Returns:
+            Dict[int, Tuple]: id -> (intervalos de preço iniciados desde `since`,
+            algum deal em promoção, created_at)
+        """
+        ids = list(ids)
+        if not ids:
+            return {}
+
+        result = await self.db.execute(
+            select(
+                self.model.id,
+                func.count(PriceHistory.id),
+                func.max(case((Deal.is_on_sale, 1), else_=0)),
+                self.model.created_at,
+            )
+            .outerjoin(Deal, Deal.game_id == self.model.id)
+            .outerjoin(PriceHistory, and_(PriceHistory.deal_id == Deal.id, PriceHistory.checked_at >= since))
+            .where(self.model.id.in_(ids))
+            .group_by(self.model.id, self.model.created_at)
+        )
+        return {
+            game_id: (changes, bool(on_sale), created_at)
+            for game_id, changes, on_sale, created_at in result.all()
+        }
+
+    async def set_next_checks(self, schedule: Dict[int, datetime]) -> None:
+        """Grava next_check_at de vários jogos (executemany por id)"""
+        if schedule:
+            await self.db.execute(
+                update(self.model),
+                [{"id": game_id, "next_check_at": at} for game_id, at in schedule.items()],
+            )
+            await self._commit()
+
+    async def search_by_title(self, title: str, limit: int = 10) -> List[Game]:
+        """
+        Busca por substring no título, mais relevantes primeiro (ver db/search_index.py)
+
+        SQLite: MATCH na FTS5 trigram ordenado por bm25. Postgres: ILIKE servido pelo
+        índice GIN pg_trgm, ordenado por similarity(). Termos com menos de 3
+        caracteres não geram trigramas e caem no ILIKE simples.
+        """
+        title = title.strip()
+        if not title:
+            return []
+
+        stmt = select(self.model).options(selectinload(self.model.deals), selectinload(self.model.price_summary))
+        if len(title) < SEARCH_MIN_TRIGRAM_LENGTH:
+            stmt = stmt.where(self.model.title.icontains(title, autoescape=True)).order_by(self.model.title)
+        elif self._dialect == "sqlite":
+            # Frase entre aspas: o termo é buscado literalmente, sem a sintaxe de consulta do FTS5
+            phrase = '"' + title.replace('"', '""') + '"'
+            stmt = (
+                stmt.join(games_fts, games_fts.c.rowid == self.model.id)
+                .where(literal_column(GAMES_FTS_TABLE).match(phrase))
+                .order_by(games_fts.c.rank, self.model.id)
+            )
+        else:
+            # Postgres (db/engine.py só aceita os dois bancos)
+            stmt = (
+                stmt.where(self.model.title.icontains(title, autoescape=True))
+                .order_by(func.similarity(self.model.title, title).desc(), self.model.id)
+            )
+
+        result = await self.db.scalars(stmt.limit(limit))
+        return list(result.all())
+
+    async def get_with_deals(self, game_id: int) -> Optional[Game]:
+        return await self.db.scalar(
+            select(self.model)
+            .options(selectinload(self.model.deals), selectinload(self.model.price_summary))
+            .where(self.model.id == game_id)
+        )
+
+    async def get_page_with_deals(self, limit: int, after_id: Optional[int] = None, skip: int = 0) -> List[Game]:
+        # selectinload: LIMIT conta jogos (não linhas do join) e os deals vêm em um SELECT ... IN
+        result = await self.db.scalars(
+            self._paginate(
+                select(self.model).options(selectinload(self.model.deals), selectinload(self.model.price_summary)),
+                limit, after_id, skip
+            )
+        )
+        return list(result.all())
+
+    async def get_page_sorted_with_deals(
+            self,
+            sort: TrackedGamesSortEnum,
+            limit: int,
+            after: Optional[Tuple[float, int]] = None,
+            skip: int = 0
+    ) -> List[Game]:
+        """
+        Página de jogos ordenada pelo resumo de preço (varredura do índice de game_price_summary)
+
+        best_price: mais barato primeiro; discount: maior desconto primeiro.
+        Jogos sem deals não entram. `after` é (valor da ordenação, game_id) do último item.
+        """
+        summary = GamePriceSummary
+        if sort == TrackedGamesSortEnum.discount:
+            value, order_by = summary.max_discount_percent, (summary.max_discount_percent.desc(), summary.game_id)
+            past = value < after[0] if after else None
+        else:
+            value, order_by = summary.best_price, (summary.best_price, summary.game_id)
+            past = value > after[0] if after else None
+
+        stmt = (
+            select(self.model)
+            .join(self.model.price_summary)
+            .options(contains_eager(self.model.price_summary), selectinload(self.model.deals))
+            .where(summary.best_price.is_not(None))
+        )
+        if after is not None:
+            stmt = stmt.where(or_(past, and_(value == after[0], summary.game_id > after[1])))
+        elif skip:
+            stmt = stmt.offset(skip)
+
+        result = await self.db.scalars(stmt.order_by(*order_by).limit(limit))
+        return list(result.all())
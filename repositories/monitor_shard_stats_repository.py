@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.MonitorShardStats import MonitorShardStats
+from repositories.base_repository import BaseRepository
+from schemas.monitoring import MonitoringStats
+
+# Contadores somados a cada tick
+COUNTERS = ("games_checked", "games_unchanged", "deals_updated", "new_sales", "price_drops", "errors")
+
+
+class MonitorShardStatsRepository(BaseRepository[MonitorShardStats]):
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(MonitorShardStats, db, autocommit)
+
+    async def get_all_shards(self) -> List[MonitorShardStats]:
+        result = await self.db.scalars(select(self.model).order_by(self.model.shard_index))
+        return list(result.all())
+
+    async def record(self, stats: MonitoringStats) -> None:
+        """Soma as estatísticas de um tick aos totais da sua shard (upsert atômico, sem ler antes)"""
+        values = {counter: getattr(stats, counter) for counter in COUNTERS}
+        values["duration_seconds"] = stats.duration_seconds or 0.0
+
+        stmt = self._insert().values(
+            shard_index=stats.shard_index,
+            shard_count=stats.shard_count,
+            ticks=1,
+            last_tick_at=stats.finished_at or datetime.now(timezone.utc),
+            **values,
+        )
+        excluded = stmt.excluded
+        set_ = {key: getattr(self.model, key) + excluded[key] for key in (*values, "ticks")}
+        set_["shard_count"] = excluded.shard_count
+        set_["last_tick_at"] = excluded.last_tick_at
+        await self.db.execute(stmt.on_conflict_do_update(index_elements=[self.model.shard_index], set_=set_))
+        await self._commit()
@@ -0,0 +1,112 @@
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.PriceHistoryDaily import PriceHistoryDaily
+from repositories.base_repository import BaseRepository
+
+# (deal_id, price, discount_percent, checked_at)
+Snapshot = Tuple[int, float, Optional[float], datetime]
+
+
+def utc_day(checked_at: datetime) -> date:
+    # SQLite devolve datetimes sem tzinfo, já em UTC
+    if checked_at.tzinfo is not None:
+        checked_at = checked_at.astimezone(timezone.utc)
+    return checked_at.date()
+
+
+class PriceHistoryDailyRepository(BaseRepository[PriceHistoryDaily]):
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(PriceHistoryDaily, db, autocommit)
+
+    async def get_by_deal(
+            self,
+            deal_id: int,
+            start: Optional[date] = None,
+            end: Optional[date] = None
+    ) -> List[PriceHistoryDaily]:
+        stmt = select(self.model).where(self.model.deal_id == deal_id)
+        if start:
+            stmt = stmt.where(self.model.day >= start)
+        if end:
+            stmt = stmt.where(self.model.day <= end)
+        result = await self.db.scalars(stmt.order_by(self.model.day))
+        return list(result.all())
+
+    async def add_snapshots(self, snapshots: Iterable[Snapshot]) -> None:
+        """
+        Incorpora snapshots aos rollups diários com um upsert por lote
+
+        Agrega o lote por (deal, dia) em memória e faz o merge com a linha
+        existente: high/low por máximo/mínimo, open/close pelo snapshot mais
+        antigo/mais recente e sample_count somado.
+        """
+        buckets: Dict[Tuple[int, date], dict] = {}
+        for deal_id, price, discount, checked_at in sorted(snapshots, key=lambda snapshot: snapshot[3]):
+            key = (deal_id, utc_day(checked_at))
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {
+                    "deal_id": deal_id,
+                    "day": key[1],
+                    "open_price": price,
+                    "high_price": price,
+                    "low_price": price,
+                    "close_price": price,
+                    "sample_count": 1,
+                    "max_discount_percent": discount,
+                    "first_checked_at": checked_at,
+                    "last_checked_at": checked_at,
+                }
+                continue
+            bucket["high_price"] = max(bucket["high_price"], price)
+            bucket["low_price"] = min(bucket["low_price"], price)
+            bucket["close_price"] = price
+            bucket["sample_count"] += 1
+            bucket["last_checked_at"] = checked_at
+            if discount is not None:
+                current = bucket["max_discount_percent"]
+                bucket["max_discount_percent"] = discount if current is None else max(current, discount)
+
+        if not buckets:
+            return
+
+        if self._dialect == "postgresql":
+            greatest, least = func.greatest, func.least
+        else:
+            # No SQLite, max()/min() com vários argumentos são escalares
+            greatest, least = func.max, func.min
+
+        table = self.model
+        stmt = self._insert().values(list(buckets.values()))
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.deal_id, table.day],
+            set_={
+                "open_price": case(
+                    (excluded.first_checked_at < table.first_checked_at, excluded.open_price),
+                    else_=table.open_price,
+                ),
+                "close_price": case(
+                    (excluded.last_checked_at >= table.last_checked_at, excluded.close_price),
+                    else_=table.close_price,
+                ),
+                "high_price": greatest(table.high_price, excluded.high_price),
+                "low_price": least(table.low_price, excluded.low_price),
+                "sample_count": table.sample_count + excluded.sample_count,
+                "max_discount_percent": greatest(
+                    func.coalesce(table.max_discount_percent, excluded.max_discount_percent),
+                    func.coalesce(excluded.max_discount_percent, table.max_discount_percent),
+                ),
+                "first_checked_at": least(table.first_checked_at, excluded.first_checked_at),
+                "last_checked_at": greatest(table.last_checked_at, excluded.last_checked_at),
+            },
+        )
+        await self.db.execute(stmt)
+        await self._commit()
+
+    async def clear(self) -> None:
+        """Remove todos os rollups (usado antes de um backfill completo)"""
+        await self.db.execute(delete(self.model))
+        await self._commit()
@@ -1,19 +1,194 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import Row, and_, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.Deal import Deal
 from db.models.PriceHistory import PriceHistory
 from repositories.base_repository import BaseRepository
+from repositories.price_history_daily_repository import PriceHistoryDailyRepository
 
 
 class PriceHistoryRepository(BaseRepository[PriceHistory]):
-    def __init__(self, db: Session):
-        super().__init__(PriceHistory, db)
-
-    def get_by_deal(self, deal_id: int) -> List[PriceHistory]:
-        return self.db.query(self.model).filter(
-            self.model.deal_id == deal_id
-        ).order_by(self.model.checked_at.desc()).all()  # type: ignore
-
-    def get_latest_by_deal(self, deal_id: int) -> Optional[PriceHistory]:
-        return self.db.query(self.model).filter(
-            self.model.deal_id == deal_id
-        ).order_by(self.model.checked_at.desc()).first()  # type: ignore
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        super().__init__(PriceHistory, db, autocommit)
+        # Rollups entram na mesma transação dos snapshots
+        self.daily = PriceHistoryDailyRepository(db, autocommit=False)
+
+    async def get_by_deal(self, deal_id: int) -> List[PriceHistory]:
+        result = await self.db.scalars(
+            select(self.model)
+            .where(self.model.deal_id == deal_id)
+            .order_by(self.model.checked_at.desc())
+        )
+        return list(result.all())
+
+    def stream_by_deal(self, deal_id: int) -> AsyncIterator[PriceHistory]:
+        return self._stream(
+            select(self.model)
+            .where(self.model.deal_id == deal_id)
+            .order_by(self.model.checked_at.desc(), self.model.id.desc())
+        )
+
+    async def get_page_by_deal(
+            self,
+            deal_id: int,
+            limit: int,
+            after: Optional[Tuple[datetime, int]] = None,
+            skip: int = 0
+    ) -> List[PriceHistory]:
+        """Histórico do mais recente para o mais antigo, paginado por (checked_at, id)"""
+        stmt = select(self.model).where(self.model.deal_id == deal_id)
+        if after is not None:
+            # Keyset sobre ix_price_history_deal_id_checked_at
+            checked_at, history_id = after
+            stmt = stmt.where(or_(
+                self.model.checked_at < checked_at,
+                and_(self.model.checked_at == checked_at, self.model.id < history_id),
+            ))
+        elif skip:
+            stmt = stmt.offset(skip)
+        result = await self.db.scalars(
+            stmt.order_by(self.model.checked_at.desc(), self.model.id.desc()).limit(limit)
+        )
+        return list(result.all())
+
+    async def get_intervals_by_deal(self, deal_id: int) -> List[Row]:
+        """Intervalos do deal em ordem cronológica (só colunas, sem carregar entidades)"""
+        result = await self.db.execute(
+            select(
+                self.model.id,
+                self.model.price,
+                self.model.discount_percent,
+                self.model.checked_at,
+                self.model.valid_to,
+            )
+            .where(self.model.deal_id == deal_id)
+            .order_by(self.model.checked_at, self.model.id)
+        )
+        return list(result.all())
+
+    async def set_bounds(self, bounds: List[dict]) -> None:
+        """Atualiza checked_at/valid_to por id (todos os dicts com as mesmas chaves)"""
+        if bounds:
+            await self.db.execute(update(self.model), bounds)
+            await self._commit()
+
+    async def delete_by_ids(self, ids: List[int]) -> int:
+        if not ids:
+            return 0
+        result = await self.db.execute(
+            delete(self.model).where(self.model.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        await self._commit()
+        return result.rowcount
+
+    async def get_latest_by_deal(self, deal_id: int) -> Optional[PriceHistory]:
+        """Snapshot mais recente via deals.last_history_id (busca por PK)"""
+        return await self.db.scalar(
+            select(self.model)
+            .join(Deal, Deal.last_history_id == self.model.id)
+            .where(Deal.id == deal_id)
+        )
+
+    async def create(self, obj_in: dict) -> PriceHistory:
+        """Registra um snapshot (ver create_many) e retorna o intervalo aberto do deal"""
+        await self.create_many([obj_in])
+        return await self.get_latest_by_deal(obj_in["deal_id"])
+
+    async def create_many(self, rows: List[dict]) -> None:
+        """
+        Registra snapshots de preço como intervalos
+
+        Preço e desconto iguais aos do intervalo aberto do deal (deals.last_history_id)
+        só estendem o valid_to dele; uma mudança abre um intervalo novo. Os rollups
+        diários recebem todos os snapshots, inclusive os que só estenderam.
+        """
+        if not rows:
+            return
+
+        snapshots = sorted(
+            (
+                {
+                    "deal_id": row["deal_id"],
+                    "price": row["price"],
+                    "discount_percent": row.get("discount_percent"),
+                    "checked_at": row.get("checked_at") or datetime.now(timezone.utc),
+                }
+                for row in rows
+            ),
+            key=lambda snapshot: snapshot["checked_at"],
+        )
+
+        # Intervalo aberto atual de cada deal: (id ou payload pendente, preço, desconto)
+        open_intervals = {
+            row.deal_id: (row.id, row.price, row.discount_percent)
+            for row in await self.db.execute(
+                select(self.model.id, self.model.deal_id, self.model.price, self.model.discount_percent)
+                .join(Deal, Deal.last_history_id == self.model.id)
+                .where(Deal.id.in_({snapshot["deal_id"] for snapshot in snapshots}))
+            )
+        }
+
+        extended: Dict[int, datetime] = {}
+        opened: List[dict] = []
+        for snapshot in snapshots:
+            current = open_intervals.get(snapshot["deal_id"])
+            if current and (current[1], current[2]) == (snapshot["price"], snapshot["discount_percent"]):
+                interval = current[0]
+                if isinstance(interval, dict):
+                    interval["valid_to"] = snapshot["checked_at"]
+                else:
+                    extended[interval] = snapshot["checked_at"]
+                continue
+
+            interval = {**snapshot, "valid_to": snapshot["checked_at"]}
+            opened.append(interval)
+            open_intervals[snapshot["deal_id"]] = (interval, snapshot["price"], snapshot["discount_percent"])
+
+        if extended:
+            await self.db.execute(update(self.model), [
+                {"id": history_id, "valid_to": valid_to} for history_id, valid_to in extended.items()
+            ])
+
+        if opened:
+            latest: Dict[int, int] = {}
+            result = await self.db.execute(insert(self.model).returning(self.model.id, self.model.deal_id), opened)
+            for row in result:
+                latest[row.deal_id] = max(row.id, latest.get(row.deal_id, row.id))
+            await self._point_latest(latest)
+
+        await self.daily.add_snapshots(
+            (snapshot["deal_id"], snapshot["price"], snapshot["discount_percent"], snapshot["checked_at"])
+            for snapshot in snapshots
+        )
+        await self._commit()
+
+    async def record_unchanged(self, game_id: int, checked_at: datetime) -> None:
+        """
+        Registra uma verificação sem mudança nos deals do jogo (sem novo snapshot)
+
+        Equivale a create_many com os preços atuais: estende até checked_at o
+        intervalo aberto (deals.last_history_id) de cada deal, com um único
+        UPDATE, e alimenta os rollups diários, senão os dias sem mudança
+        ficariam sem linha no gráfico.
+        """
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id.in_(select(Deal.last_history_id).where(Deal.game_id == game_id)))
+            .values(valid_to=checked_at)
+            .returning(self.model.deal_id, self.model.price, self.model.discount_percent),
+            execution_options={"synchronize_session": False},
+        )
+        await self.daily.add_snapshots(
+            (row.deal_id, row.price, row.discount_percent, checked_at) for row in result.all()
+        )
+        await self._commit()
+
+    async def _point_latest(self, latest: Dict[int, int]) -> None:
+        """Aponta deals.last_history_id para o intervalo aberto mais recente"""
+        if latest:
+            await self.db.execute(update(Deal), [
+                {"id": deal_id, "last_history_id": history_id}
+                for deal_id, history_id in latest.items()
+            ])
@@ -1,22 +1,29 @@
 # routes/tracked_games.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from db.engine import get_db
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Callable, List, Optional
+from core.ndjson import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+from core.pagination import NEXT_CURSOR_HEADER
+from db.engine import SessionLocal, get_db
 from schemas.game import GameResponse
 from schemas.deal import DealResponse
-from schemas.price_history import PriceHistoryResponse
+from schemas.price_history import PriceHistoryResponse, PriceRollupResponse
 from schemas.game_data import GameData
 from schemas.game_search import GameSearchResponse
 from schemas.game_lookup import GameLookupResponse
 from schemas.price_change import GamePriceChangeResponse
+from schemas.monitoring import MonitorShardStatsResponse
 from schemas.requests import (
     SearchGamesQuery,
+    SearchTrackedGamesQuery,
     LookupGameQuery,
     DealsQuery,
     TrackGameByTitleQuery,
     TrackGameByIdQuery,
     PaginationQuery,
+    TrackedGamesQuery,
+    RollupQuery,
     GameIdPath,
     DealIdPath,
 )
@@ -24,30 +31,55 @@ from schemas.responses import (
     MessageResponse,
     TrackGameResponse,
     StoreResponse,
+    UpstreamStatsResponse,
 )
 from services.game_aggregator_service import GameAggregatorService
 from services.cheap_shark_service import CheapSharkService
+from services.http_client import get_http_client
+from services.price_monitor_service import PriceMonitorService
+from services.rate_limiter import rate_limiter
+from services.response_cache import response_cache
 
 router = APIRouter(prefix="/games", tags=["games"])
 
 
+def _set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    # O corpo continua sendo a lista; o cursor da próxima página vai no header
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+async def _stream_rows(rows: Callable[[GameAggregatorService], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    # O streaming continua depois que a sessão da request (get_db) é fechada,
+    # então usa uma sessão própria, aberta só enquanto o corpo é enviado
+    async with SessionLocal() as db:
+        async for row in rows(GameAggregatorService(db)):
+            yield row
+
+
+# Documenta o modo NDJSON (Accept: application/x-ndjson) no OpenAPI
+NDJSON_RESPONSES = {200: {"content": {NDJSON_MEDIA_TYPE: {}}}}
+
+
 @router.get("/search", response_model=List[GameSearchResponse])
 async def search_games(
         params: SearchGamesQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Busca jogos na CheapShark API"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     return await service.search_games(params.q, params.limit)
 
 
 @router.get("/lookup", response_model=GameLookupResponse)
 async def lookup_game(
         params: LookupGameQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Busca um jogo e retorna todas as ofertas disponíveis"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     result = await service.lookup_game_by_title(params.title)
     if not result:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -57,27 +89,44 @@ async def lookup_game(
 @router.get("/deals", response_model=List[GameData], tags=["admin"])
 async def get_deals(
         params: DealsQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Obtém promoções atuais"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     return await service.get_deals(params.store_id, params.min_discount, params.max_price, params.limit)
 
 
 @router.get("/stores", response_model=List[StoreResponse], tags=["admin"])
-async def get_stores():
+async def get_stores(http_client: httpx.AsyncClient = Depends(get_http_client)):
     """Lista todas as stores disponíveis"""
-    cheapshark = CheapSharkService()
+    cheapshark = CheapSharkService(http_client)
     return await cheapshark.get_stores()
 
 
+@router.get("/upstream/stats", response_model=UpstreamStatsResponse, tags=["admin"])
+async def get_upstream_stats():
+    """Métricas do cache de respostas e do rate limiter da CheapShark"""
+    return UpstreamStatsResponse(cache=response_cache.stats(), rate_limiter=rate_limiter.stats())
+
+
+@router.get("/monitor/shards", response_model=List[MonitorShardStatsResponse], tags=["admin"])
+async def get_monitor_shard_stats(
+        db: AsyncSession = Depends(get_db)
+):
+    """Totais acumulados do monitor por shard (um worker líder por shard)"""
+    service = PriceMonitorService(db)
+    return await service.get_shard_stats()
+
+
 @router.post("/track-game", response_model=TrackGameResponse)
 async def track_game_by_title(
         params: TrackGameByTitleQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Adiciona um jogo para rastrear preços em todas as lojas"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     result = await service.track_game_by_title(params.title)
     if not result:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -88,10 +137,11 @@ async def track_game_by_title(
 @router.post("/track-game-by-id", response_model=TrackGameResponse, tags=["admin"])
 async def track_game_by_id(
         params: TrackGameByIdQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Adiciona um jogo para rastrear preços em todas as lojas pelo ID"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     result = await service.track_game_by_id(params.game_id)
     if not result:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -101,22 +151,35 @@ async def track_game_by_id(
 
 @router.get("/tracked", response_model=List[GameResponse])
 async def get_tracked_games(
-        params: PaginationQuery = Depends(),
-        db: Session = Depends(get_db)
+        response: Response,
+        params: TrackedGamesQuery = Depends(),
+        db: AsyncSession = Depends(get_db)
+):
+    """Lista jogos rastreados (sort=best_price|discount: só jogos com deals, via game_price_summary)"""
+    service = GameAggregatorService(db)
+    games, next_cursor = await service.get_tracked_games(params.limit, params.cursor, params.skip, params.sort)
+    _set_next_cursor(response, next_cursor)
+    return games
+
+
+@router.get("/tracked/search", response_model=List[GameResponse])
+async def search_tracked_games(
+        params: SearchTrackedGamesQuery = Depends(),
+        db: AsyncSession = Depends(get_db)
 ):
-    """Lista jogos rastreados"""
+    """Busca jogos rastreados pelo título (mais relevantes primeiro)"""
     service = GameAggregatorService(db)
-    return service.get_tracked_games(params.skip, params.limit)
+    return await service.search_tracked_games(params.q, params.limit)
 
 
 @router.get("/tracked/games/{game_id}", response_model=GameResponse)
 async def get_tracked_game(
         params: GameIdPath = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """Detalhe de um jogo rastreado"""
     service = GameAggregatorService(db)
-    game = service.get_tracked_game(params.game_id)
+    game = await service.get_tracked_game(params.game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
@@ -125,10 +188,11 @@ async def get_tracked_game(
 @router.get("/tracked/games/{game_id}/changes", response_model=GamePriceChangeResponse)
 async def get_game_price_changes(
         params: GameIdPath = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """Atualiza e retorna mudanças de preço desde o último snapshot"""
-    service = GameAggregatorService(db)
+    service = GameAggregatorService(db, http_client)
     changes = await service.check_price_changes_for_game(params.game_id)
     if not changes:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -137,46 +201,96 @@ async def get_game_price_changes(
 
 @router.get("/tracked/deals", response_model=List[DealResponse], tags=["admin"])
 async def get_tracked_deals(
+        response: Response,
         params: PaginationQuery = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """Lista deals rastreados"""
     service = GameAggregatorService(db)
-    return service.get_tracked_deals(params.skip, params.limit)
+    deals, next_cursor = await service.get_tracked_deals(params.limit, params.cursor, params.skip)
+    _set_next_cursor(response, next_cursor)
+    return deals
 
 
-@router.get("/tracked/sales", response_model=List[DealResponse], tags=["admin"])
-async def get_tracked_sales(db: Session = Depends(get_db)):
-    """Lista deals rastreados que estão em promoção"""
+@router.get("/tracked/sales", response_model=List[DealResponse], tags=["admin"], responses=NDJSON_RESPONSES)
+async def get_tracked_sales(
+        response: Response,
+        params: PaginationQuery = Depends(),
+        accept: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_db)
+):
+    """Lista deals rastreados que estão em promoção (NDJSON: todos, sem paginação)"""
+    if wants_ndjson(accept):
+        return ndjson_response(
+            _stream_rows(lambda service: service.stream_tracked_deals_on_sale()),
+            DealResponse
+        )
+
     service = GameAggregatorService(db)
-    return service.get_tracked_deals_on_sale()
+    deals, next_cursor = await service.get_tracked_deals_on_sale(params.limit, params.cursor, params.skip)
+    _set_next_cursor(response, next_cursor)
+    return deals
 
 
-@router.get("/tracked/deals/{deal_id}/history", response_model=List[PriceHistoryResponse], tags=["admin"])
+@router.get(
+    "/tracked/deals/{deal_id}/history",
+    response_model=List[PriceHistoryResponse],
+    tags=["admin"],
+    responses=NDJSON_RESPONSES
+)
 async def get_deal_history(
+        response: Response,
         params: DealIdPath = Depends(),
-        db: Session = Depends(get_db)
+        pagination: PaginationQuery = Depends(),
+        accept: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_db)
 ):
-    """Lista histórico de preço de um deal"""
+    """Lista histórico de preço de um deal (mais recente primeiro; NDJSON: completo)"""
     service = GameAggregatorService(db)
-    history = service.get_deal_history(params.deal_id)
-    if history is None:
+    if wants_ndjson(accept):
+        deal = await service.get_tracked_deal(params.deal_id)
+        if not deal:
+            raise HTTPException(status_code=404, detail="Deal not found")
+        deal_row_id = deal.id
+        return ndjson_response(
+            _stream_rows(lambda streaming: streaming.stream_deal_history(deal_row_id)),
+            PriceHistoryResponse
+        )
+
+    result = await service.get_deal_history(params.deal_id, pagination.limit, pagination.cursor, pagination.skip)
+    if result is None:
         raise HTTPException(status_code=404, detail="Deal not found")
+    history, next_cursor = result
+    _set_next_cursor(response, next_cursor)
     return history
 
 
+@router.get(
+    "/tracked/deals/{deal_id}/history/rollup",
+    response_model=List[PriceRollupResponse],
+    tags=["admin"]
+)
+async def get_deal_price_rollups(
+        params: DealIdPath = Depends(),
+        query: RollupQuery = Depends(),
+        db: AsyncSession = Depends(get_db)
+):
+    """Histórico de preço agregado em candles OHLC por dia, semana ou mês"""
+    service = GameAggregatorService(db)
+    rollups = await service.get_deal_price_rollups(params.deal_id, query.resolution, query.start, query.end)
+    if rollups is None:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    return rollups
+
+
 @router.delete("/tracked/deals/{deal_id}", response_model=MessageResponse, tags=["admin"])
 async def untrack_deal(
         params: DealIdPath = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """Remove um deal do rastreamento"""
     service = GameAggregatorService(db)
-    deal = service.deals.get_by_deal_id(params.deal_id)
-    if not deal:
-        raise HTTPException(status_code=404, detail="Deal not found")
-
-    if not service.deals.delete(deal.id):
+    if not await service.untrack_deal(params.deal_id):
         raise HTTPException(status_code=404, detail="Deal not found")
 
     return MessageResponse(message="Deal untracked successfully")
@@ -185,15 +299,11 @@ async def untrack_deal(
 @router.delete("/tracked/games/{game_id}", response_model=MessageResponse)
 async def untrack_game(
         params: GameIdPath = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """Remove um jogo e todos os seus deals"""
     service = GameAggregatorService(db)
-    game = service.games.get_by_id(params.game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-
-    if not service.games.delete(params.game_id):
+    if not await service.untrack_game(params.game_id):
         raise HTTPException(status_code=404, detail="Game not found")
 
     return MessageResponse(message="Game untracked successfully")
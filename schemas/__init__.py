@@ -1,6 +1,6 @@
-from schemas.game import GameResponse
+from schemas.game import GameResponse, GamePriceSummaryResponse
 from schemas.deal import DealResponse
-from schemas.price_history import PriceHistoryResponse
+from schemas.price_history import PriceHistoryResponse, PriceRollupResponse
 from schemas.game_data import GameData
 from schemas.game_lookup import GameLookupResponse
 from schemas.game_search import GameSearchResponse
@@ -9,11 +9,14 @@ from schemas.monitoring import MonitoringStats, GameCheckResult, MonitoringRespo
 from schemas.price_alert import PriceAlertResponse
 from schemas.requests import (
     SearchGamesQuery,
+    SearchTrackedGamesQuery,
     LookupGameQuery,
     DealsQuery,
     TrackGameByTitleQuery,
     TrackGameByIdQuery,
     PaginationQuery,
+    TrackedGamesQuery,
+    RollupQuery,
     GameIdPath,
     DealIdPath,
 )
@@ -24,12 +27,17 @@ from schemas.responses import (
     RootResponse,
     StoreImages,
     StoreResponse,
+    CacheStatsResponse,
+    RateLimiterStatsResponse,
+    UpstreamStatsResponse,
 )
 
 __all__ = [
     "GameResponse",
+    "GamePriceSummaryResponse",
     "DealResponse",
     "PriceHistoryResponse",
+    "PriceRollupResponse",
     "GameData",
     "GameLookupResponse",
     "GameSearchResponse",
@@ -41,11 +49,14 @@ __all__ = [
     "MonitoringResponse",
     "PriceAlertResponse",
     "SearchGamesQuery",
+    "SearchTrackedGamesQuery",
     "LookupGameQuery",
     "DealsQuery",
     "TrackGameByTitleQuery",
     "TrackGameByIdQuery",
     "PaginationQuery",
+    "TrackedGamesQuery",
+    "RollupQuery",
     "GameIdPath",
     "DealIdPath",
     "MessageResponse",
@@ -54,4 +65,7 @@ __all__ = [
     "RootResponse",
     "StoreImages",
     "StoreResponse",
+    "CacheStatsResponse",
+    "RateLimiterStatsResponse",
+    "UpstreamStatsResponse",
 ]
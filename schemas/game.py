@@ -10,9 +10,22 @@ class GameBase(BaseModel):
     image_url: Optional[str] = None
 
 
+class GamePriceSummaryResponse(BaseModel):
+    best_price: Optional[float] = None
+    best_deal_id: Optional[str] = None
+    best_store_name: Optional[str] = None
+    max_discount_percent: Optional[float] = None
+    deal_count: int = 0
+    all_time_low: Optional[float] = None
+    all_time_low_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
 class GameResponse(GameBase):
     id: int
     created_at: datetime
     deals: List[DealResponse] = []
+    price_summary: Optional[GamePriceSummaryResponse] = None
 
     model_config = {"from_attributes": True}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 
 class GameData(BaseModel):
@@ -14,4 +15,19 @@ class GameData(BaseModel):
     discount_percentage: float = 0.0
     url: Optional[str] = None
     image_url: Optional[str] = None
-    is_on_sale: bool = False
\ No newline at end of file
+    is_on_sale: bool = False
+
+    def to_deal_payload(self, game_id: int, checked_at: datetime) -> dict:
+        """Payload da tabela deals para este deal (usado nos upserts em lote)"""
+        return {
+            "game_id": game_id,
+            "deal_id": self.deal_id,
+            "store_id": self.store_id,
+            "store_name": self.store_name,
+            "current_price": self.price,
+            "original_price": self.original_price,
+            "discount_percentage": self.discount_percentage,
+            "is_on_sale": self.is_on_sale,
+            "url": self.url,
+            "last_checked_at": checked_at,
+        }
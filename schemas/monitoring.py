@@ -6,6 +6,7 @@ from datetime import datetime
 class MonitoringStats(BaseModel):
     """Estatísticas de uma execução de monitoramento"""
     games_checked: int = Field(..., description="Número de jogos verificados")
+    games_unchanged: int = Field(default=0, description="Jogos sem mudança nos deals desde o último ciclo")
     deals_updated: int = Field(..., description="Número de deals atualizados")
     new_sales: int = Field(..., description="Número de novas promoções detectadas")
     price_drops: int = Field(..., description="Número de quedas de preço detectadas")
@@ -13,11 +14,32 @@ class MonitoringStats(BaseModel):
     started_at: Optional[datetime] = Field(None, description="Hora de início")
     finished_at: Optional[datetime] = Field(default=None, description="Hora de término")
     duration_seconds: Optional[float] = Field(default=None, description="Duração em segundos")
+    shard_index: int = Field(default=0, description="Shard verificada (games.id % shard_count)")
+    shard_count: int = Field(default=1, description="Total de shards do monitor")
+
+
+class MonitorShardStatsResponse(BaseModel):
+    """Totais acumulados do monitor em uma shard"""
+    shard_index: int
+    shard_count: int
+    ticks: int
+    games_checked: int
+    games_unchanged: int
+    deals_updated: int
+    new_sales: int
+    price_drops: int
+    errors: int
+    duration_seconds: float
+    last_tick_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
 
 class GameCheckResult(BaseModel):
     """Resultado da verificação de um jogo específico"""
     game_id: int
     game_title: str
+    unchanged: bool = False
     deals_updated: int = 0
     new_sales: int = 0
     price_drops: int = 0
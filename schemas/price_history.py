@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 
@@ -10,3 +10,14 @@ class PriceHistoryResponse(BaseModel):
     checked_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class PriceRollupResponse(BaseModel):
+    """Candle OHLC de um período (dia, semana ISO ou mês, em UTC)"""
+    period_start: date
+    open: float
+    high: float
+    low: float
+    close: float
+    sample_count: int
+    max_discount_percent: Optional[float] = None
@@ -1,5 +1,8 @@
 from pydantic import BaseModel, Field
+from datetime import date
 from typing import Optional
+from core.enums.RollupResolutionEnum import RollupResolutionEnum
+from core.enums.TrackedGamesSortEnum import TrackedGamesSortEnum
 
 
 class SearchGamesQuery(BaseModel):
@@ -7,6 +10,11 @@ class SearchGamesQuery(BaseModel):
     limit: int = Field(10, ge=1, le=60)
 
 
+class SearchTrackedGamesQuery(BaseModel):
+    q: str = Field(..., min_length=1, description="Trecho do título do jogo rastreado")
+    limit: int = Field(20, ge=1, le=100)
+
+
 class LookupGameQuery(BaseModel):
     title: str = Field(..., description="Nome do jogo para listar lojas e preços")
 
@@ -27,8 +35,22 @@ class TrackGameByIdQuery(BaseModel):
 
 
 class PaginationQuery(BaseModel):
-    skip: int = 0
-    limit: int = 100
+    cursor: Optional[str] = Field(None, description="Cursor opaco recebido no header X-Next-Cursor")
+    limit: int = Field(100, ge=1, le=1000)
+    skip: int = Field(0, ge=0, description="Obsoleto: use cursor (OFFSET fica lento em páginas profundas)")
+
+
+class TrackedGamesQuery(PaginationQuery):
+    sort: TrackedGamesSortEnum = Field(
+        TrackedGamesSortEnum.id,
+        description="Ordenação: id, best_price (mais barato primeiro) ou discount (maior desconto primeiro)"
+    )
+
+
+class RollupQuery(BaseModel):
+    resolution: RollupResolutionEnum = Field(RollupResolutionEnum.day, description="Agrupamento: day, week ou month")
+    start: Optional[date] = Field(None, description="Primeiro dia (UTC), inclusive")
+    end: Optional[date] = Field(None, description="Último dia (UTC), inclusive")
 
 
 class GameIdPath(BaseModel):
@@ -35,3 +35,28 @@ class StoreResponse(BaseModel):
     storeName: str
     isActive: int
     images: StoreImages
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    stale_hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+
+class RateLimiterStatsResponse(BaseModel):
+    rate_per_second: float
+    burst: int
+    acquired: int
+    delayed: int
+    wait_seconds_total: float
+    max_wait_seconds: float
+    throttled_responses: int
+    retries: int
+
+
+class UpstreamStatsResponse(BaseModel):
+    cache: CacheStatsResponse
+    rate_limiter: RateLimiterStatsResponse
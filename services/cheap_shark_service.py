@@ -1,14 +1,59 @@
+import asyncio
+import logging
+import random
 import httpx
-from typing import List, Optional, Dict
-import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Dict, Tuple
 from schemas.game_data import GameData
 from schemas.game_search import GameSearchResponse
 from schemas.game_lookup import GameLookupResponse
+from services.response_cache import response_cache
+from services.rate_limiter import rate_limiter
+from services.single_flight import single_flight
+from services.store_registry import store_registry
+from core.text import normalize_title
 import os
 
 CHEAP_SHARK_URL = os.getenv("CHEAP_SHARK_URL")
 CHEAP_SHARK_BASE_URL = os.getenv("CHEAP_SHARK_BASE_URL")
 
+# TTL (segundos) do cache de respostas por endpoint
+CHEAP_SHARK_CACHE_TTL_SEARCH = int(os.getenv("CHEAP_SHARK_CACHE_TTL_SEARCH", "600"))
+CHEAP_SHARK_CACHE_TTL_GAME = int(os.getenv("CHEAP_SHARK_CACHE_TTL_GAME", "60"))
+CHEAP_SHARK_CACHE_TTL_DEALS = int(os.getenv("CHEAP_SHARK_CACHE_TTL_DEALS", "120"))
+
+# Deals por página na listagem usada pelo sync do catálogo (máximo da API)
+CHEAP_SHARK_CATALOG_PAGE_SIZE = 60
+
+# Retentativas em 429/5xx/erros de rede (backoff exponencial com jitter)
+CHEAP_SHARK_MAX_RETRIES = int(os.getenv("CHEAP_SHARK_MAX_RETRIES", "3"))
+CHEAP_SHARK_BACKOFF_BASE_SECONDS = float(os.getenv("CHEAP_SHARK_BACKOFF_BASE_SECONDS", "0.5"))
+CHEAP_SHARK_BACKOFF_MAX_SECONDS = float(os.getenv("CHEAP_SHARK_BACKOFF_MAX_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Lê o header Retry-After (segundos ou data HTTP)"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Backoff exponencial com full jitter"""
+    return random.uniform(0, min(CHEAP_SHARK_BACKOFF_MAX_SECONDS, CHEAP_SHARK_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
 
 class CheapSharkService:
     if not CHEAP_SHARK_BASE_URL:
@@ -16,57 +61,116 @@ class CheapSharkService:
 
     BASE_URL = CHEAP_SHARK_BASE_URL
 
-    _store_cache: Dict[str, str] = {}
-    _store_cache_loaded_at: float = 0.0
-    _store_cache_ttl_seconds: int = 60 * 60 * 24
-
-    async def _load_store_cache(self) -> None:
-        """Carrega e cacheia o mapeamento storeID -> storeName"""
-        now = time.time()
-        if self._store_cache and (now - self._store_cache_loaded_at) < self._store_cache_ttl_seconds:
-            return
+    # Limite de IDs aceitos pelo lookup multi-ID de /games
+    GAMES_BULK_MAX_IDS: int = 25
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.BASE_URL}/stores")
-            stores = response.json()
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
 
-        self._store_cache = {s["storeID"]: s["storeName"] for s in stores}
-        self._store_cache_loaded_at = now
+    async def _get(self, path: str, params: Optional[Dict] = None) -> httpx.Response:
+        """
+        Executa um GET na CheapShark usando o cliente HTTP compartilhado
 
-    async def _get_store_name(self, store_id: Optional[str]) -> Optional[str]:
-        if not store_id:
-            return None
-        await self._load_store_cache()
-        return self._store_cache.get(store_id)
+        Passa pelo rate limiter do processo e refaz a requisição em 429/5xx ou
+        erro de rede, respeitando Retry-After. Após esgotar as tentativas,
+        retorna a última resposta (ou propaga o erro de rede).
+        """
+        url = f"{self.BASE_URL}{path}"
+        attempt = 0
+        while True:
+            await rate_limiter.acquire()
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TransportError as e:
+                if attempt >= CHEAP_SHARK_MAX_RETRIES:
+                    raise
+                delay = _backoff_seconds(attempt)
+                logger.warning(f"Erro de rede em {path} ({e!r}); nova tentativa em {delay:.2f}s")
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                if attempt >= CHEAP_SHARK_MAX_RETRIES:
+                    return response
+
+                retry_after = _retry_after_seconds(response)
+                delay = retry_after if retry_after is not None else _backoff_seconds(attempt)
+                # Retry-After grande (ou hostil) não congela o processo além do teto
+                delay = min(delay, CHEAP_SHARK_BACKOFF_MAX_SECONDS)
+                if response.status_code == 429:
+                    # Todos os callers do processo param até o fim do Retry-After
+                    rate_limiter.throttled_responses += 1
+                    rate_limiter.pause(delay)
+                logger.warning(f"CheapShark respondeu {response.status_code} em {path}; nova tentativa em {delay:.2f}s")
+
+            rate_limiter.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _fetch_stores(self) -> List[Dict]:
+        """Busca o diretório storeID -> storeName na CheapShark"""
+        response = await self._get("/stores")
+        response.raise_for_status()
+        stores = response.json()
+        if not isinstance(stores, list):
+            raise ValueError("Resposta inesperada de /stores")
+        return stores
+
+    async def _ensure_stores(self) -> None:
+        """Garante o diretório de stores carregado no registry do processo"""
+        await store_registry.ensure_loaded(self._fetch_stores)
 
     async def get_stores(self) -> List[Dict]:
         """Lista todas as stores disponíveis"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.BASE_URL}/stores")
-            return response.json()
-
-    async def search_games(self, title: str, limit: int = 10) -> List[GameSearchResponse]:
-        """Busca jogos por título"""
-        async with httpx.AsyncClient() as client:
-            params = {"title": title, "limit": limit}
-            response = await client.get(f"{self.BASE_URL}/games", params=params)
-            games = response.json()
-
-            result = []
-            for game in games:
-                cheapest_price = float(game.get("cheapest", 0))
-                result.append(GameSearchResponse(
-                    title=game["external"],
-                    game_id=game.get("gameID"),
-                    deal_id=game.get("cheapestDealID"),
-                    price=cheapest_price,
-                    discount_percentage=0.0,
-                    url=f"{CHEAP_SHARK_URL}{game.get('cheapestDealID')}" if CHEAP_SHARK_URL else None,
-                    image_url=game.get("thumb"),
-                    is_on_sale=False
-                ))
-
-            return result
+        await self._ensure_stores()
+        return store_registry.get_stores()
+
+    async def search_games(
+            self,
+            title: str,
+            limit: int = 10,
+            on_fetch: Optional[Callable[[List[GameSearchResponse]], Awaitable[None]]] = None
+    ) -> List[GameSearchResponse]:
+        """
+        Busca jogos por título (com cache)
+
+        `on_fetch` só roda quando os resultados vêm da CheapShark: hits do cache
+        e quem esperou a mesma busca em andamento não o chamam.
+        """
+        key = ("search", normalize_title(title), limit)
+
+        async def load() -> List[GameSearchResponse]:
+            results = await self._search_games(title, limit)
+            if on_fetch:
+                await on_fetch(results)
+            return results
+
+        return await response_cache.get_or_load(
+            key,
+            CHEAP_SHARK_CACHE_TTL_SEARCH,
+            lambda: single_flight.do(key, load),
+        )
+
+    async def _search_games(self, title: str, limit: int) -> List[GameSearchResponse]:
+        params = {"title": title, "limit": limit}
+        response = await self._get("/games", params=params)
+        response.raise_for_status()
+        games = response.json()
+
+        result = []
+        for game in games:
+            cheapest_price = float(game.get("cheapest", 0))
+            result.append(GameSearchResponse(
+                title=game["external"],
+                game_id=game.get("gameID"),
+                deal_id=game.get("cheapestDealID"),
+                price=cheapest_price,
+                discount_percentage=0.0,
+                url=f"{CHEAP_SHARK_URL}{game.get('cheapestDealID')}" if CHEAP_SHARK_URL else None,
+                image_url=game.get("thumb"),
+                is_on_sale=False
+            ))
+
+        return result
 
     async def get_deals(
             self,
@@ -75,85 +179,126 @@ class CheapSharkService:
             max_price: Optional[float] = None,
             limit: int = 60
     ) -> List[GameData]:
-        """Obtém deals/promoções"""
-        async with httpx.AsyncClient() as client:
-            params = {
-                "pageSize": limit,
-                "lowerPrice": 0,
-            }
-
-            if store_id:
-                params["storeID"] = store_id
-            if max_price:
-                params["upperPrice"] = max_price
-            if min_discount > 0:
-                params["onSale"] = 1
-
-            response = await client.get(f"{self.BASE_URL}/deals", params=params)
-            deals = response.json()
-
-            result = []
-            for deal in deals:
-                sale_price = float(deal["salePrice"])
-                normal_price = float(deal["normalPrice"])
-                savings = float(deal["savings"])
-                store_id = deal["storeID"]
-
-                # Filtrar por desconto mínimo
-                if savings < min_discount:
-                    continue
-
-                store_name = await self._get_store_name(store_id)
-                result.append(GameData(
-                    title=deal["title"],
-                    deal_id=deal["dealID"],
-                    store_id=store_id,
-                    store_name=store_name or f"Store {store_id}",
-                    price=sale_price,
-                    original_price=normal_price,
-                    discount_percentage=round(savings, 2),
-                    url=f"{CHEAP_SHARK_URL}{deal['dealID']}" if CHEAP_SHARK_URL else None,
-                    image_url=deal.get("thumb"),
-                    is_on_sale=True
-                ))
-
-            return result
+        """Obtém deals/promoções (com cache)"""
+        key = ("deals", store_id or None, min_discount, float(max_price) if max_price else None, limit)
+        return await response_cache.get_or_load(
+            key,
+            CHEAP_SHARK_CACHE_TTL_DEALS,
+            lambda: single_flight.do(key, lambda: self._get_deals(store_id, min_discount, max_price, limit)),
+        )
+
+    async def _get_deals(
+            self,
+            store_id: Optional[str],
+            min_discount: int,
+            max_price: Optional[float],
+            limit: int
+    ) -> List[GameData]:
+        params = {
+            "pageSize": limit,
+            "lowerPrice": 0,
+        }
+
+        if store_id:
+            params["storeID"] = store_id
+        if max_price:
+            params["upperPrice"] = max_price
+        if min_discount > 0:
+            params["onSale"] = 1
+
+        response = await self._get("/deals", params=params)
+        response.raise_for_status()
+        deals = response.json()
+        await self._ensure_stores()
+
+        result = []
+        for deal in deals:
+            sale_price = float(deal["salePrice"])
+            normal_price = float(deal["normalPrice"])
+            savings = float(deal["savings"])
+            store_id = deal["storeID"]
+
+            # Filtrar por desconto mínimo
+            if savings < min_discount:
+                continue
+
+            store_name = store_registry.get_name(store_id)
+            result.append(GameData(
+                title=deal["title"],
+                deal_id=deal["dealID"],
+                store_id=store_id,
+                store_name=store_name or f"Store {store_id}",
+                price=sale_price,
+                original_price=normal_price,
+                discount_percentage=round(savings, 2),
+                url=f"{CHEAP_SHARK_URL}{deal['dealID']}" if CHEAP_SHARK_URL else None,
+                image_url=deal.get("thumb"),
+                is_on_sale=True
+            ))
 
-    async def get_game_details(self, game_id: str) -> Optional[GameData]:
-        """Obtém detalhes de um jogo específico"""
-        async with httpx.AsyncClient() as client:
-            params = {"id": game_id}
-            response = await client.get(f"{self.BASE_URL}/games", params=params)
+        return result
 
-            if response.status_code != 200:
-                return None
+    async def get_catalog_page(self, page_number: int) -> Tuple[List[GameSearchResponse], int]:
+        """
+        Uma página da listagem de deals, usada para espelhar o catálogo (sem cache)
 
-            data = response.json()
+        Returns:
+            Tuple[List[GameSearchResponse], int]: jogos da página e total de páginas
+        """
+        params = {"pageNumber": page_number, "pageSize": CHEAP_SHARK_CATALOG_PAGE_SIZE}
+        response = await self._get("/deals", params=params)
+        response.raise_for_status()
+        total_pages = int(response.headers.get("X-Total-Page-Count", page_number + 1))
+
+        result = []
+        for deal in response.json():
+            result.append(GameSearchResponse(
+                title=deal["title"],
+                game_id=deal.get("gameID"),
+                deal_id=deal.get("dealID"),
+                price=float(deal["salePrice"]),
+                discount_percentage=round(float(deal.get("savings", 0)), 2),
+                url=f"{CHEAP_SHARK_URL}{deal.get('dealID')}" if CHEAP_SHARK_URL else None,
+                image_url=deal.get("thumb"),
+                is_on_sale=float(deal.get("savings", 0)) > 0
+            ))
+        return result, total_pages
 
-            if not data.get("deals"):
-                return None
+    async def get_game_details(self, game_id: str) -> Optional[GameData]:
+        """Obtém detalhes de um jogo específico"""
+        params = {"id": game_id}
+        response = await self._get("/games", params=params)
 
-            # Pega o melhor deal
-            best_deal = min(data["deals"], key=lambda x: float(x["price"]))
+        if response.status_code != 200:
+            return None
 
-            sale_price = float(best_deal["price"])
-            retail_price = float(best_deal["retailPrice"])
-            savings = float(best_deal["savings"])
+        data = response.json()
 
-            store_name = await self._get_store_name(best_deal["storeID"])
-            return GameData(
-                title=data["info"]["title"],
-                game_id=game_id,
-                deal_id=best_deal["dealID"],
-                store_id=best_deal["storeID"],
-                store_name=store_name or "Unknown",
-                price=sale_price,
-                original_price=retail_price,
-                discount_percentage=round(savings, 2),
-                url=f"{CHEAP_SHARK_URL}{best_deal['dealID']}" if CHEAP_SHARK_URL else None,
-                image_url=data["info"].get("thumb"),
-                is_on_sale=savings > 0
-            )
+        if not data.get("deals"):
+            return None
+
+        # Pega o melhor deal
+        best_deal = min(data["deals"], key=lambda x: float(x["price"]))
+
+        sale_price = float(best_deal["price"])
+        retail_price = float(best_deal["retailPrice"])
+        savings = float(best_deal["savings"])
+
+        await self._ensure_stores()
+        store_name = store_registry.get_name(best_deal["storeID"])
+        return GameData(
+            title=data["info"]["title"],
+            game_id=game_id,
+            deal_id=best_deal["dealID"],
+            store_id=best_deal["storeID"],
+            store_name=store_name or "Unknown",
+            price=sale_price,
+            original_price=retail_price,
+            discount_percentage=round(savings, 2),
+            url=f"{CHEAP_SHARK_URL}{best_deal['dealID']}" if CHEAP_SHARK_URL else None,
+            image_url=data["info"].get("thumb"),
+            is_on_sale=savings > 0
+        )
 
     async def get_game_deals(self, game_id: str) -> Optional[GameLookupResponse]:
         """
@@ -162,76 +307,135 @@ class CheapSharkService:
         Returns:
             GameDealsResponse: Schema Pydantic com title, image_url e deals
         """
-        async with httpx.AsyncClient() as client:
-            params = {"id": game_id}
-            response = await client.get(f"{self.BASE_URL}/games", params=params)
-
-            if response.status_code != 200:
-                return None
-
-            data = response.json()
-
-            if not data.get("deals"):
-                return None
-
-            title = data["info"]["title"]
-            image_url = data["info"].get("thumb")
-            deals = []
-
-            for deal in data["deals"]:
-                sale_price = float(deal["price"])
-                retail_price = float(deal.get("retailPrice", sale_price))
-                savings = float(deal.get("savings", 0))
-                store_id = deal.get("storeID")
-                deal_id = deal.get("dealID")
-
-                store_name = await self._get_store_name(store_id)
-                deals.append(GameData(
-                    title=title,
-                    game_id=game_id,
-                    deal_id=deal_id,
-                    store_id=store_id,
-                    store_name=store_name or (f"Store {store_id}" if store_id else None),
-                    price=sale_price,
-                    original_price=retail_price,
-                    discount_percentage=round(savings, 2),
-                    url=f"{CHEAP_SHARK_URL}{deal_id}" if (CHEAP_SHARK_URL and deal_id) else None,
-                    image_url=image_url,
-                    is_on_sale=savings > 0
-                ))
-
-            return GameLookupResponse(
-                title=title,
-                image_url=image_url,
-                deals=deals
+        key = ("games", game_id)
+        return await response_cache.get_or_load(
+            key,
+            CHEAP_SHARK_CACHE_TTL_GAME,
+            lambda: single_flight.do(key, lambda: self._get_game_deals(game_id)),
+        )
+
+    async def _get_game_deals(self, game_id: str) -> Optional[GameLookupResponse]:
+        params = {"id": game_id}
+        response = await self._get("/games", params=params)
+
+        if response.status_code != 200:
+            return None
+
+        await self._ensure_stores()
+        return self._parse_game_deals(game_id, response.json())
+
+    async def get_games_deals_bulk(self, game_ids: List[str]) -> Dict[str, GameLookupResponse]:
+        """
+        Obtém as ofertas de vários jogos usando o lookup multi-ID (ids=a,b,c)
+
+        Os IDs são enviados em lotes de até GAMES_BULK_MAX_IDS por requisição.
+
+        Returns:
+            Dict[str, GameLookupResponse]: gameID -> ofertas (jogos sem deals ficam de fora)
+        """
+        unique_ids = list(dict.fromkeys(game_id for game_id in game_ids if game_id))
+        result: Dict[str, GameLookupResponse] = {}
+        await self._ensure_stores()
+
+        for start in range(0, len(unique_ids), self.GAMES_BULK_MAX_IDS):
+            chunk = unique_ids[start:start + self.GAMES_BULK_MAX_IDS]
+            # IDs já em voo (ex.: /changes de um desses jogos) são aguardados, não refeitos
+            loaded = await single_flight.do_many(
+                [("games", game_id) for game_id in chunk],
+                self._fetch_games_chunk,
             )
 
-    async def get_deal_by_id(self, deal_id: str) -> Optional[GameData]:
-        """Obtém detalhes de um deal específico"""
-        async with httpx.AsyncClient() as client:
-            params = {"id": deal_id}
-            response = await client.get(f"{self.BASE_URL}/deals", params=params)
+            for (_, game_id), game_deals in loaded.items():
+                if game_deals:
+                    result[game_id] = game_deals
+                    # Aproveita o lote para aquecer o cache de lookups individuais
+                    response_cache.set(("games", game_id), game_deals, CHEAP_SHARK_CACHE_TTL_GAME)
+
+        return result
+
+    async def _fetch_games_chunk(self, keys: List[tuple]) -> Dict[tuple, Optional[GameLookupResponse]]:
+        """Busca um lote do lookup multi-ID; recebe e retorna chaves ("games", gameID)"""
+        game_ids = [game_id for _, game_id in keys]
+        response = await self._get("/games", params={"ids": ",".join(game_ids)})
 
-            if response.status_code != 200:
-                return None
+        if response.status_code != 200:
+            return {}
 
-            deal = response.json()
+        data = response.json()
+        if not isinstance(data, dict):
+            return {}
 
-            sale_price = float(deal["gameInfo"]["salePrice"])
-            retail_price = float(deal["gameInfo"]["retailPrice"])
-            savings = ((retail_price - sale_price) / retail_price * 100) if retail_price > 0 else 0
+        return {
+            ("games", game_id): self._parse_game_deals(game_id, data.get(game_id) or {})
+            for game_id in game_ids
+        }
 
-            store_name = await self._get_store_name(deal["gameInfo"].get("storeID"))
-            return GameData(
-                title=deal["gameInfo"]["name"],
-                game_id=deal["gameInfo"].get("gameID"),
+    def _parse_game_deals(self, game_id: str, data: Dict) -> Optional[GameLookupResponse]:
+        """Converte o payload de /games (info + deals) em GameLookupResponse"""
+        if not data.get("deals"):
+            return None
+
+        title = data["info"]["title"]
+        image_url = data["info"].get("thumb")
+        deals = []
+
+        for deal in data["deals"]:
+            sale_price = float(deal["price"])
+            retail_price = float(deal.get("retailPrice", sale_price))
+            savings = float(deal.get("savings", 0))
+            store_id = deal.get("storeID")
+            deal_id = deal.get("dealID")
+
+            store_name = store_registry.get_name(store_id)
+            deals.append(GameData(
+                title=title,
+                game_id=game_id,
                 deal_id=deal_id,
-                store_id=deal["gameInfo"].get("storeID"),
-                store_name=store_name or "Unknown",
+                store_id=store_id,
+                store_name=store_name or (f"Store {store_id}" if store_id else None),
                 price=sale_price,
                 original_price=retail_price,
                 discount_percentage=round(savings, 2),
-                url=f"{CHEAP_SHARK_URL}{deal_id}" if CHEAP_SHARK_URL else None,
-                image_url=deal["gameInfo"].get("thumb"),
+                url=f"{CHEAP_SHARK_URL}{deal_id}" if (CHEAP_SHARK_URL and deal_id) else None,
+                image_url=image_url,
                 is_on_sale=savings > 0
-            )
+            ))
+
+        return GameLookupResponse(
+            title=title,
+            image_url=image_url,
+            deals=deals
+        )
+
+    async def get_deal_by_id(self, deal_id: str) -> Optional[GameData]:
+        """Obtém detalhes de um deal específico"""
+        return await single_flight.do(("deal", deal_id), lambda: self._get_deal_by_id(deal_id))
+
+    async def _get_deal_by_id(self, deal_id: str) -> Optional[GameData]:
+        params = {"id": deal_id}
+        response = await self._get("/deals", params=params)
+
+        if response.status_code != 200:
+            return None
+
+        deal = response.json()
+
+        sale_price = float(deal["gameInfo"]["salePrice"])
+        retail_price = float(deal["gameInfo"]["retailPrice"])
+        savings = ((retail_price - sale_price) / retail_price * 100) if retail_price > 0 else 0
+
+        await self._ensure_stores()
+        store_name = store_registry.get_name(deal["gameInfo"].get("storeID"))
+        return GameData(
+            title=deal["gameInfo"]["name"],
+            game_id=deal["gameInfo"].get("gameID"),
+            deal_id=deal_id,
+            store_id=deal["gameInfo"].get("storeID"),
+            store_name=store_name or "Unknown",
+            price=sale_price,
+            original_price=retail_price,
+            discount_percentage=round(savings, 2),
+            url=f"{CHEAP_SHARK_URL}{deal_id}" if CHEAP_SHARK_URL else None,
+            image_url=deal["gameInfo"].get("thumb"),
+            is_on_sale=savings > 0
+        )
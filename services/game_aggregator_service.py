@@ -1,28 +1,61 @@
 # services/game_aggregator_service.py
-from typing import List, Optional, Tuple
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.cheap_shark_service import CheapSharkService
+from core.enums.RollupResolutionEnum import RollupResolutionEnum
+from core.enums.TrackedGamesSortEnum import TrackedGamesSortEnum
+from core.pagination import decode_cursor, paginate
+from db.models import Deal, Game, PriceHistory
+from db.unit_of_work import unit_of_work
+from repositories.catalog_game_repository import CatalogEntry, CatalogGameRepository
 from repositories.game_repository import GameRepository
 from repositories.deal_repository import DealRepository
+from repositories.game_price_summary_repository import GamePriceSummaryRepository
 from repositories.price_history_repository import PriceHistoryRepository
+from repositories.price_history_daily_repository import PriceHistoryDailyRepository
 from schemas.game_data import GameData
 from schemas.game_search import GameSearchResponse
 from schemas.game_lookup import GameLookupResponse
 from schemas.price_change import GamePriceChangeResponse, DealPriceChange, BestPriceChange
+from schemas.price_history import PriceRollupResponse
+
+
+def _period_start(day: date, resolution: RollupResolutionEnum) -> date:
+    if resolution == RollupResolutionEnum.week:
+        return day - timedelta(days=day.weekday())
+    if resolution == RollupResolutionEnum.month:
+        return day.replace(day=1)
+    return day
 
 
 class GameAggregatorService:
-    def __init__(self, db: Session):
+    def __init__(
+            self,
+            db: AsyncSession,
+            http_client: Optional[httpx.AsyncClient] = None
+    ):
         self.db = db
-        self.games = GameRepository(db)
-        self.deals = DealRepository(db)
-        self.history = PriceHistoryRepository(db)
-        self.cheapshark = CheapSharkService()
+        # Repositórios em unit of work: cada operação abaixo abre sua transação
+        self.games = GameRepository(db, autocommit=False)
+        self.deals = DealRepository(db, autocommit=False)
+        self.history = PriceHistoryRepository(db, autocommit=False)
+        self.rollups = PriceHistoryDailyRepository(db, autocommit=False)
+        self.summaries = GamePriceSummaryRepository(db, autocommit=False)
+        self.catalog = CatalogGameRepository(db, autocommit=False)
+        # Sem cliente HTTP só as operações de banco ficam disponíveis (rotas que não
+        # chamam a CheapShark não dependem do cliente do lifespan)
+        self.cheapshark = CheapSharkService(http_client) if http_client is not None else None
 
     async def search_games(self, query: str, limit: int = 10) -> List[GameSearchResponse]:
-        """Busca jogos na CheapShark"""
-        return await self.cheapshark.search_games(query, limit)
+        """Busca jogos na CheapShark (resultados novos da API alimentam o catálogo local)"""
+        return await self.cheapshark.search_games(query, limit, on_fetch=self._mirror_search_results)
+
+    async def _mirror_search_results(self, results: List[GameSearchResponse]) -> None:
+        # Só para buscas que foram à CheapShark: respostas do cache já estão no catálogo
+        async with unit_of_work(self.db):
+            await self.catalog.upsert_many((result.game_id, result.title, result.image_url) for result in results)
 
     async def get_deals(
             self,
@@ -34,17 +67,29 @@ class GameAggregatorService:
         """Obtém promoções"""
         return await self.cheapshark.get_deals(store_id, min_discount, max_price, limit)
 
-    async def lookup_game_by_title(self, title: str) -> Optional[GameLookupResponse]:
-        """Busca um jogo por nome e retorna todas as ofertas"""
-        results = await self.cheapshark.search_games(title, limit=1)
-        if not results:
+    async def _resolve_title(self, title: str) -> Optional[CatalogEntry]:
+        """
+        Resolve um título para (gameID, título, image_url)
+
+        Consulta primeiro o catálogo local (título normalizado, indexado) e só
+        então a busca da CheapShark, que também alimenta o catálogo.
+        """
+        entry = await self.catalog.get_by_title(title)
+        if entry:
+            return entry.external_id, entry.title, entry.image_url
+
+        results = await self.search_games(title, limit=1)
+        if not results or not results[0].game_id:
             return None
+        return results[0].game_id, results[0].title, results[0].image_url
 
-        game_id = results[0].game_id
-        if not game_id:
+    async def lookup_game_by_title(self, title: str) -> Optional[GameLookupResponse]:
+        """Busca um jogo por nome e retorna todas as ofertas"""
+        resolved = await self._resolve_title(title)
+        if not resolved:
             return None
 
-        return await self.cheapshark.get_game_deals(game_id)
+        return await self.cheapshark.get_game_deals(resolved[0])
 
     async def track_deal(self, deal_id: str) -> Optional[Tuple[int, int]]:
         """Adiciona um deal para rastrear e cria histórico"""
@@ -55,105 +100,59 @@ class GameAggregatorService:
         if not deal_data.game_id:
             return None
 
-        game = self.games.get_by_external_id(deal_data.game_id)
-        if not game:
-            game = self.games.create({
-                "external_id": deal_data.game_id,
-                "title": deal_data.title,
-                "image_url": deal_data.image_url,
-            })
-
-        deal = self.deals.get_by_deal_id(deal_id)
         now = datetime.now(timezone.utc)
-        deal_payload = {
-            "game_id": game.id,
-            "deal_id": deal_id,
-            "store_id": deal_data.store_id,
-            "store_name": deal_data.store_name,
-            "current_price": deal_data.price,
-            "original_price": deal_data.original_price,
-            "discount_percentage": deal_data.discount_percentage,
-            "is_on_sale": deal_data.is_on_sale,
-            "url": deal_data.url,
-            "last_checked_at": now,
-        }
+        async with unit_of_work(self.db):
+            game = await self.games.get_by_external_id(deal_data.game_id)
+            if not game:
+                game = await self.games.create({
+                    "external_id": deal_data.game_id,
+                    "title": deal_data.title,
+                    "image_url": deal_data.image_url,
+                })
 
-        if deal:
-            deal = self.deals.update(deal.id, deal_payload)
-        else:
-            deal = self.deals.create(deal_payload)
+            deal = await self.deals.get_by_deal_id(deal_id)
+            deal_payload = deal_data.to_deal_payload(game.id, now)
 
-        if deal:
-            self.history.create({
-                "deal_id": deal.id,
-                "price": deal_data.price,
-                "discount_percent": deal_data.discount_percentage,
-                "checked_at": now,
-            })
+            if deal:
+                deal = await self.deals.update(deal.id, deal_payload)
+            else:
+                deal = await self.deals.create(deal_payload)
+
+            if deal:
+                await self.history.create({
+                    "deal_id": deal.id,
+                    "price": deal_data.price,
+                    "discount_percent": deal_data.discount_percentage,
+                    "checked_at": now,
+                })
+                await self.summaries.refresh([game.id])
+                await self.games.clear_fingerprints([game.id])
 
         return (game.id, deal.id) if deal else None
 
     async def track_game_by_title(self, title: str) -> Optional[Tuple[int, int]]:
         """Rastreia um jogo pelo nome e salva todos os deals atuais"""
-        results = await self.cheapshark.search_games(title, limit=1)
-        if not results:
-            return None
-
-        game_id = results[0].game_id
-        if not game_id:
+        resolved = await self._resolve_title(title)
+        if not resolved:
             return None
 
-        game = self.games.get_by_external_id(game_id)
-        if not game:
-            game = self.games.create({
-                "external_id": game_id,
-                "title": results[0].title,
-                "image_url": results[0].image_url,
-            })
-
+        game_id, resolved_title, image_url = resolved
         deals_response = await self.cheapshark.get_game_deals(game_id)
         if not deals_response:
             return None
 
-        created_deals = 0
-        now = datetime.now(timezone.utc)
-
-        for deal in deals_response.deals:
-            existing = self.deals.get_by_deal_id(deal.deal_id) if deal.deal_id else None
-            payload = {
-                "game_id": game.id,
-                "deal_id": deal.deal_id,
-                "store_id": deal.store_id,
-                "store_name": deal.store_name,
-                "current_price": deal.price,
-                "original_price": deal.original_price,
-                "discount_percentage": deal.discount_percentage,
-                "is_on_sale": deal.is_on_sale,
-                "url": deal.url,
-                "last_checked_at": now,
-            }
-
-            if existing:
-                if existing.current_price != deal.price:
-                    deal_row = self.deals.update(existing.id, payload)
-                    if deal_row:
-                        self.history.create({
-                            "deal_id": deal_row.id,
-                            "price": deal.price,
-                            "discount_percent": deal.discount_percentage,
-                            "checked_at": now,
-                        })
-            else:
-                deal_row = self.deals.create(payload)
-                created_deals += 1
-                if deal_row:
-                    self.history.create({
-                        "deal_id": deal_row.id,
-                        "price": deal.price,
-                        "discount_percent": deal.discount_percentage,
-                        "checked_at": now,
-                    })
+        # Só abre a transação depois das chamadas à API
+        async with unit_of_work(self.db):
+            game = await self.games.get_by_external_id(game_id)
+            if not game:
+                game = await self.games.create({
+                    "external_id": game_id,
+                    "title": resolved_title,
+                    "image_url": image_url,
+                })
 
+            created_deals = await self._save_game_deals(game.id, deals_response.deals, datetime.now(timezone.utc))
+            await self.games.clear_fingerprints([game.id])
         return (game.id, created_deals)
 
     async def track_game_by_id(self, game_id: str) -> Optional[Tuple[int, int]]:
@@ -165,58 +164,53 @@ class GameAggregatorService:
         if not deals_response:
             return None
 
-        game = self.games.get_by_external_id(game_id)
-        if not game:
-            game = self.games.create({
-                "external_id": game_id,
-                "title": deals_response.title,
-                "image_url": deals_response.image_url,
-            })
+        async with unit_of_work(self.db):
+            await self.catalog.upsert_many([(game_id, deals_response.title, deals_response.image_url)])
+            game = await self.games.get_by_external_id(game_id)
+            if not game:
+                game = await self.games.create({
+                    "external_id": game_id,
+                    "title": deals_response.title,
+                    "image_url": deals_response.image_url,
+                })
 
-        created_deals = 0
-        now = datetime.now(timezone.utc)
+            created_deals = await self._save_game_deals(game.id, deals_response.deals, datetime.now(timezone.utc))
+            await self.games.clear_fingerprints([game.id])
+        return (game.id, created_deals)
 
-        for deal in deals_response.deals:
-            existing = self.deals.get_by_deal_id(deal.deal_id) if deal.deal_id else None
-            payload = {
-                "game_id": game.id,
-                "deal_id": deal.deal_id,
-                "store_id": deal.store_id,
-                "store_name": deal.store_name,
-                "current_price": deal.price,
-                "original_price": deal.original_price,
-                "discount_percentage": deal.discount_percentage,
-                "is_on_sale": deal.is_on_sale,
-                "url": deal.url,
-                "last_checked_at": now,
-            }
+    async def _save_game_deals(self, game_id: int, deals: List[GameData], now: datetime) -> int:
+        """
+        Grava (upsert em lote) os deals de um jogo e o histórico dos que mudaram
+
+        Returns:
+            int: quantidade de deals novos
+        """
+        deals = [deal for deal in deals if deal.deal_id]
+        previous_prices = {
+            existing.deal_id: existing.current_price
+            for existing in await self.deals.get_by_deal_ids(deal.deal_id for deal in deals)
+        }
 
-            if existing:
-                if existing.current_price != deal.price:
-                    deal_row = self.deals.update(existing.id, payload)
-                    if deal_row:
-                        self.history.create({
-                            "deal_id": deal_row.id,
-                            "price": deal.price,
-                            "discount_percent": deal.discount_percentage,
-                            "checked_at": now,
-                        })
-            else:
-                deal_row = self.deals.create(payload)
-                created_deals += 1
-                if deal_row:
-                    self.history.create({
-                        "deal_id": deal_row.id,
-                        "price": deal.price,
-                        "discount_percent": deal.discount_percentage,
-                        "checked_at": now,
-                    })
+        row_ids = await self.deals.upsert_many([deal.to_deal_payload(game_id, now) for deal in deals])
 
-        return (game.id, created_deals)
+        # Histórico só para deals novos ou com preço diferente
+        await self.history.create_many([
+            {
+                "deal_id": row_ids[deal.deal_id],
+                "price": deal.price,
+                "discount_percent": deal.discount_percentage,
+                "checked_at": now,
+            }
+            for deal in deals
+            if previous_prices.get(deal.deal_id) != deal.price
+        ])
+        await self.summaries.refresh([game_id])
+
+        return sum(1 for deal in deals if deal.deal_id not in previous_prices)
 
     async def update_tracked_deal(self, deal_id: str) -> Optional[GameData]:
         """Atualiza preço de um deal rastreado"""
-        deal = self.deals.get_by_deal_id(deal_id)
+        deal = await self.deals.get_by_deal_id(deal_id)
         if not deal:
             return None
 
@@ -224,9 +218,17 @@ class GameAggregatorService:
         if not updated:
             return None
 
-        now = datetime.now(timezone.utc)
-        if deal.current_price != updated.price:
-            self.deals.update(deal.id, {
+        async with unit_of_work(self.db):
+            if await self._apply_deal_update(deal.id, deal.current_price, updated, datetime.now(timezone.utc)):
+                await self.summaries.refresh([deal.game_id])
+                await self.games.clear_fingerprints([deal.game_id])
+        return updated
+
+    async def _apply_deal_update(self, deal_row_id: int, current_price: float, updated: GameData,
+                                 now: datetime) -> bool:
+        """Grava o novo preço de um deal rastreado e o histórico, se o preço mudou"""
+        if current_price != updated.price:
+            await self.deals.update(deal_row_id, {
                 "current_price": updated.price,
                 "original_price": updated.original_price,
                 "discount_percentage": updated.discount_percentage,
@@ -235,22 +237,27 @@ class GameAggregatorService:
                 "last_checked_at": now,
             })
 
-            self.history.create({
-                "deal_id": deal.id,
+            await self.history.create({
+                "deal_id": deal_row_id,
                 "price": updated.price,
                 "discount_percent": updated.discount_percentage,
                 "checked_at": now,
             })
+            return True
+        return False
 
-        return updated
-
-    async def check_price_changes_for_game(self, game_id: int) -> Optional[GamePriceChangeResponse]:
+    async def check_price_changes_for_game(
+            self,
+            game_id: int,
+            deals_response: Optional[GameLookupResponse] = None
+    ) -> Optional[GamePriceChangeResponse]:
         """Atualiza deals do jogo e retorna mudanças desde o último snapshot"""
-        game = self.games.get_by_id(game_id)
+        game = await self.games.get_by_id(game_id)
         if not game:
             return None
 
-        deals_response = await self.cheapshark.get_game_deals(game.external_id)
+        if deals_response is None:
+            deals_response = await self.cheapshark.get_game_deals(game.external_id)
         if not deals_response:
             return None
 
@@ -260,40 +267,29 @@ class GameAggregatorService:
         current_prices: List[float] = []
         best_current = None
 
-        for deal in deals_response.deals:
-            if not deal.deal_id:
-                continue
+        deals = [deal for deal in deals_response.deals if deal.deal_id]
+        game_title = game.title
+        previous_by_deal_id = {}
 
-            existing = self.deals.get_by_deal_id(deal.deal_id)
-            last_history = self.history.get_latest_by_deal(existing.id) if existing else None
-
-            payload = {
-                "game_id": game.id,
-                "deal_id": deal.deal_id,
-                "store_id": deal.store_id,
-                "store_name": deal.store_name,
-                "current_price": deal.price,
-                "original_price": deal.original_price,
-                "discount_percentage": deal.discount_percentage,
-                "is_on_sale": deal.is_on_sale,
-                "url": deal.url,
-                "last_checked_at": now,
-            }
+        async with unit_of_work(self.db):
+            for existing, last_history in await self.deals.get_with_latest_history(deal.deal_id for deal in deals):
+                previous_by_deal_id[existing.deal_id] = last_history.price if last_history else None
 
-            if existing:
-                deal_row = self.deals.update(existing.id, payload)
-            else:
-                deal_row = self.deals.create(payload)
-
-            if deal_row:
-                self.history.create({
-                    "deal_id": deal_row.id,
+            row_ids = await self.deals.upsert_many([deal.to_deal_payload(game_id, now) for deal in deals])
+            await self.history.create_many([
+                {
+                    "deal_id": row_ids[deal.deal_id],
                     "price": deal.price,
                     "discount_percent": deal.discount_percentage,
                     "checked_at": now,
-                })
+                }
+                for deal in deals
+            ])
+            await self.summaries.refresh([game_id])
+            await self.games.clear_fingerprints([game_id])
 
-            previous_price = last_history.price if last_history else None
+        for deal in deals:
+            previous_price = previous_by_deal_id.get(deal.deal_id)
             change_amount = (deal.price - previous_price) if previous_price is not None else None
             change_percent = ((deal.price - previous_price) / previous_price * 100) if previous_price else None
 
@@ -331,41 +327,137 @@ class GameAggregatorService:
         )
 
         return GamePriceChangeResponse(
-            game_id=game.id,
-            title=game.title,
+            game_id=game_id,
+            title=game_title,
             deals=deal_changes,
             best_price=best_price,
         )
 
-    async def update_all_tracked_deals(self) -> int:
-        """Atualiza preços de todos os deals rastreados"""
-        deals = self.deals.get_all()
-        updated_count = 0
-        for deal in deals:
-            updated = await self.update_tracked_deal(deal.deal_id)
-            if updated:
-                updated_count += 1
-        return updated_count
-
-    def get_tracked_games(self, skip: int = 0, limit: int = 100):
-        """Lista jogos rastreados"""
-        return self.games.get_all_with_deals(skip, limit)
-
-    def get_tracked_game(self, game_id: int):
-        game = self.games.get_by_id(game_id)
+    async def get_tracked_games(
+            self,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            skip: int = 0,
+            sort: TrackedGamesSortEnum = TrackedGamesSortEnum.id
+    ) -> Tuple[List[Game], Optional[str]]:
+        """Lista jogos rastreados (página + cursor da próxima)"""
+        if sort == TrackedGamesSortEnum.id:
+            after_id = decode_cursor(cursor, int)[0] if cursor else None
+            games = await self.games.get_page_with_deals(limit + 1, after_id, skip)
+            return paginate(games, limit, key=lambda game: (game.id,))
+
+        after = decode_cursor(cursor, float, int) if cursor else None
+        games = await self.games.get_page_sorted_with_deals(sort, limit + 1, after, skip)
+        if sort == TrackedGamesSortEnum.discount:
+            return paginate(games, limit, key=lambda game: (game.price_summary.max_discount_percent, game.id))
+        return paginate(games, limit, key=lambda game: (game.price_summary.best_price, game.id))
+
+    async def search_tracked_games(self, query: str, limit: int = 20) -> List[Game]:
+        """Busca jogos rastreados pelo título usando o índice de busca do banco"""
+        return await self.games.search_by_title(query, limit)
+
+    async def get_tracked_game(self, game_id: int):
+        game = await self.games.get_with_deals(game_id)
         if not game:
             return None
         return game
 
-    def get_tracked_deals(self, skip: int = 0, limit: int = 100):
-        return self.deals.get_all(skip, limit)
-
-    def get_tracked_deals_on_sale(self):
+    async def get_tracked_deals(
+            self,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            skip: int = 0
+    ) -> Tuple[List[Deal], Optional[str]]:
+        after_id = decode_cursor(cursor, int)[0] if cursor else None
+        deals = await self.deals.get_page(limit + 1, after_id, skip)
+        return paginate(deals, limit, key=lambda deal: (deal.id,))
+
+    async def get_tracked_deals_on_sale(
+            self,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            skip: int = 0
+    ) -> Tuple[List[Deal], Optional[str]]:
         """Lista deals rastreados que estão em promoção"""
-        return self.deals.get_on_sale()
+        after_id = decode_cursor(cursor, int)[0] if cursor else None
+        deals = await self.deals.get_on_sale_page(limit + 1, after_id, skip)
+        return paginate(deals, limit, key=lambda deal: (deal.id,))
+
+    def stream_tracked_deals_on_sale(self) -> AsyncIterator[Deal]:
+        """Todos os deals em promoção, lidos do banco em lotes"""
+        return self.deals.stream_on_sale()
+
+    async def untrack_deal(self, deal_id: str) -> bool:
+        """Remove um deal (e seu histórico) do rastreamento"""
+        async with unit_of_work(self.db):
+            deal = await self.deals.get_by_deal_id(deal_id)
+            if not deal:
+                return False
+            game_id = deal.game_id
+            await self.deals.delete(deal.id)
+            await self.summaries.refresh([game_id])
+            # O fingerprint ainda descreve o deal removido: o próximo ciclo reconcilia
+            await self.games.clear_fingerprints([game_id])
+            return True
+
+    async def untrack_game(self, game_id: int) -> bool:
+        """Remove um jogo e todos os seus deals"""
+        async with unit_of_work(self.db):
+            return await self.games.delete(game_id)
+
+    async def get_deal_history(
+            self,
+            deal_id: str,
+            limit: int = 100,
+            cursor: Optional[str] = None,
+            skip: int = 0
+    ) -> Optional[Tuple[List[PriceHistory], Optional[str]]]:
+        after = decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+        deal = await self.deals.get_by_deal_id(deal_id)
+        if not deal:
+            return None
+        history = await self.history.get_page_by_deal(deal.id, limit + 1, after, skip)
+        return paginate(history, limit, key=lambda row: (row.checked_at, row.id))
 
-    def get_deal_history(self, deal_id: str):
-        deal = self.deals.get_by_deal_id(deal_id)
+    async def get_deal_price_rollups(
+            self,
+            deal_id: str,
+            resolution: RollupResolutionEnum = RollupResolutionEnum.day,
+            start: Optional[date] = None,
+            end: Optional[date] = None
+    ) -> Optional[List[PriceRollupResponse]]:
+        """Candles OHLC do deal lidos de price_history_daily (semana/mês agregados dos dias)"""
+        deal = await self.deals.get_by_deal_id(deal_id)
         if not deal:
             return None
-        return self.history.get_by_deal(deal.id)
+
+        candles: Dict[date, PriceRollupResponse] = {}
+        for daily in await self.rollups.get_by_deal(deal.id, start, end):
+            period = _period_start(daily.day, resolution)
+            candle = candles.get(period)
+            if candle is None:
+                candles[period] = PriceRollupResponse(
+                    period_start=period,
+                    open=daily.open_price,
+                    high=daily.high_price,
+                    low=daily.low_price,
+                    close=daily.close_price,
+                    sample_count=daily.sample_count,
+                    max_discount_percent=daily.max_discount_percent,
+                )
+                continue
+            # Dias chegam em ordem: o último dia do período define o close
+            candle.high = max(candle.high, daily.high_price)
+            candle.low = min(candle.low, daily.low_price)
+            candle.close = daily.close_price
+            candle.sample_count += daily.sample_count
+            if daily.max_discount_percent is not None:
+                candle.max_discount_percent = max(candle.max_discount_percent or 0.0, daily.max_discount_percent)
+        return list(candles.values())
+
+    async def get_tracked_deal(self, deal_id: str) -> Optional[Deal]:
+        return await self.deals.get_by_deal_id(deal_id)
+
+    def stream_deal_history(self, deal_row_id: int) -> AsyncIterator[PriceHistory]:
+        """Histórico completo de um deal (mais recente primeiro), lido em lotes"""
+        return self.history.stream_by_deal(deal_row_id)
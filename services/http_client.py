@@ -0,0 +1,43 @@
+# services/http_client.py
+import importlib.util
+import logging
+import os
+from typing import Optional
+
+import httpx
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def create_http_client(
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        http2: Optional[bool] = None,
+) -> httpx.AsyncClient:
+    """Cria o cliente HTTP compartilhado (pool de conexões com keep-alive)"""
+    use_http2 = HTTP2_ENABLED if http2 is None else http2
+    if use_http2 and importlib.util.find_spec("h2") is None:
+        # HTTP/2 depende do extra httpx[http2]; sem ele seguimos em HTTP/1.1
+        logger.warning("HTTP/2 solicitado, mas o pacote 'h2' não está instalado; usando HTTP/1.1")
+        use_http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections or HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=max_keepalive_connections or HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=use_http2)
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependency que retorna o cliente HTTP criado no lifespan da aplicação"""
+    return request.app.state.http_client
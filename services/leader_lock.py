@@ -0,0 +1,135 @@
+# services/leader_lock.py
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Chave do pg_advisory_lock do monitor (a mesma em todos os processos do deploy)
+MONITOR_LEADER_LOCK_KEY = int(os.getenv("MONITOR_LEADER_LOCK_KEY", "727001"))
+# Arquivo do flock no SQLite (padrão: ao lado do arquivo do banco)
+MONITOR_LOCK_PATH = os.getenv("MONITOR_LOCK_PATH")
+
+
+class LeaderLock:
+    """
+    Garante um único líder entre os processos que rodam o monitor
+
+    - Postgres: pg_try_advisory_lock em uma conexão dedicada; o lock é do
+      servidor e cai junto com a conexão se o processo morrer
+    - SQLite: flock exclusivo em um arquivo; o SO libera quando o processo morre
+
+    Não bloqueia: `acquire()` tenta a cada chamada e devolve se este processo é
+    o líder, então um seguidor assume no próximo tick após a queda do líder.
+    Com o monitor em shards há um líder por shard (chave key + shard_index).
+    """
+
+    def __init__(
+            self,
+            engine: AsyncEngine,
+            key: int = MONITOR_LEADER_LOCK_KEY,
+            path: Optional[str] = MONITOR_LOCK_PATH,
+            shard_index: int = 0
+    ):
+        self.engine = engine
+        self.key = key + shard_index
+        self.dialect = engine.dialect.name
+        self.path = path or self._default_path()
+        if shard_index:
+            self.path = f"{self.path}.shard{shard_index}"
+        self._connection: Optional[AsyncConnection] = None
+        self._file = None
+        self._assumed = False
+
+    def _default_path(self) -> str:
+        database = self.engine.url.database
+        if self.dialect == "sqlite" and database and database != ":memory:":
+            return f"{database}.monitor.lock"
+        return os.path.join(os.getenv("TMPDIR", "/tmp"), "game-price-tracker-monitor.lock")
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None or self._file is not None or self._assumed
+
+    async def acquire(self) -> bool:
+        """Tenta assumir (ou confirmar) a liderança; True se este processo é o líder"""
+        if self.dialect == "postgresql":
+            return await self._acquire_advisory()
+        if self.dialect == "sqlite" and fcntl is not None:
+            return self._acquire_flock()
+        # Sem primitiva de lock disponível: assume processo único
+        if not self._assumed:
+            logger.warning(f"Leader lock indisponível para {self.dialect}; o monitor roda neste processo")
+            self._assumed = True
+        return True
+
+    async def _acquire_advisory(self) -> bool:
+        if self._connection is not None:
+            try:
+                # Conexão perdida = lock perdido no servidor
+                await self._connection.execute(text("SELECT 1"))
+                await self._connection.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"Conexão do leader lock perdida ({e!r}); tentando reassumir")
+                await self._close_connection()
+
+        connection = await self.engine.connect()
+        try:
+            acquired = await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+            # Fecha a transação implícita; o advisory lock de sessão continua valendo
+            await connection.commit()
+        except Exception:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+
+        self._connection = connection
+        logger.info(f"Liderança do monitor assumida (advisory lock {self.key})")
+        return True
+
+    def _acquire_flock(self) -> bool:
+        if self._file is not None:
+            return True
+
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._file = lock_file
+        logger.info(f"Liderança do monitor assumida (flock {self.path})")
+        return True
+
+    async def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+    async def release(self) -> None:
+        """Libera a liderança (no shutdown); a queda do processo também libera"""
+        if self._connection is not None:
+            try:
+                await self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                await self._connection.commit()
+            finally:
+                await self._close_connection()
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._assumed = False
@@ -0,0 +1,82 @@
+# services/monitor_executor.py
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "4"))
+MONITOR_TASK_TIMEOUT_SECONDS = float(os.getenv("MONITOR_TASK_TIMEOUT_SECONDS", "30"))
+
+JobType = TypeVar("JobType")
+FetchedType = TypeVar("FetchedType")
+
+_DONE = object()
+
+
+@dataclass
+class ExecutorResult(Generic[JobType]):
+    """Resultado de uma execução: jobs gravados e jobs que falharam (com o erro)"""
+    completed: int = 0
+    failed: List[Tuple[JobType, BaseException]] = field(default_factory=list)
+
+
+class MonitorExecutor(Generic[JobType, FetchedType]):
+    """
+    Executa jobs do monitor com concorrência limitada
+
+    A etapa de busca (rede) roda em paralelo, limitada por `concurrency` e com
+    timeout por job. A etapa de gravação roda em uma única task writer, que é a
+    única a usar a sessão do banco, então as escritas nunca se intercalam.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, task_timeout: Optional[float] = None):
+        self.concurrency = max(1, concurrency or MONITOR_CONCURRENCY)
+        self.task_timeout = task_timeout or MONITOR_TASK_TIMEOUT_SECONDS
+
+    async def run(
+            self,
+            jobs: Iterable[JobType],
+            fetch: Callable[[JobType], Awaitable[FetchedType]],
+            write: Callable[[JobType, FetchedType], Awaitable[Any]],
+    ) -> ExecutorResult[JobType]:
+        """Busca todos os jobs concorrentemente e grava os resultados em sequência"""
+        outcome: ExecutorResult[JobType] = ExecutorResult()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def fetch_job(job: JobType) -> None:
+            async with semaphore:
+                try:
+                    fetched = await asyncio.wait_for(fetch(job), timeout=self.task_timeout)
+                except Exception as e:
+                    logger.error(f"Erro ao buscar job do monitor: {e!r}")
+                    outcome.failed.append((job, e))
+                    return
+            await queue.put((job, fetched))
+
+        async def writer() -> None:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    return
+                job, fetched = item
+                try:
+                    await write(job, fetched)
+                    outcome.completed += 1
+                except Exception as e:
+                    logger.error(f"Erro ao gravar job do monitor: {e!r}")
+                    outcome.failed.append((job, e))
+
+        writer_task = asyncio.create_task(writer())
+        try:
+            await asyncio.gather(*(fetch_job(job) for job in jobs))
+            await queue.put(_DONE)
+            await writer_task
+        finally:
+            if not writer_task.done():
+                writer_task.cancel()
+
+        return outcome
@@ -0,0 +1,100 @@
+# services/monitor_runner.py
+import asyncio
+import contextlib
+import logging
+import os
+from typing import List, Optional
+
+import httpx
+
+from db.engine import SessionLocal, engine
+from jobs.compact_price_history import compact_price_history
+from schemas.monitoring import MonitoringStats
+from services.leader_lock import LeaderLock
+from services.monitor_executor import MonitorExecutor
+from services.monitor_shard import MonitorShard, default_shard
+from services.price_monitor_service import PriceMonitorService
+
+logger = logging.getLogger(__name__)
+
+# O intervalo de cada jogo vem do agendador (services/monitor_scheduler.py);
+# a cada tick só os jogos vencidos são verificados
+MONITOR_TICK_SECONDS = int(os.getenv("MONITOR_TICK_SECONDS", "60"))
+# 0 desliga a compactação agendada (pode rodar via python -m jobs.compact_price_history)
+HISTORY_COMPACTION_INTERVAL_SECONDS = int(os.getenv("HISTORY_COMPACTION_INTERVAL_SECONDS", "0"))
+
+
+class MonitorRunner:
+    """
+    Loops em background do monitor e da compactação
+
+    Usado pelo lifespan da API (MONITOR_IN_APP) e pelo worker dedicado
+    (python -m worker). Só o processo líder da shard (ver LeaderLock) faz
+    trabalho; os demais da mesma shard tentam assumir a cada tick.
+    """
+
+    def __init__(
+            self,
+            http_client: httpx.AsyncClient,
+            executor: Optional[MonitorExecutor] = None,
+            tick_seconds: Optional[int] = None,
+            compaction_interval_seconds: Optional[int] = None,
+            shard: Optional[MonitorShard] = None
+    ):
+        self.http_client = http_client
+        self.executor = executor
+        self.tick_seconds = tick_seconds or MONITOR_TICK_SECONDS
+        self.compaction_interval_seconds = (
+            HISTORY_COMPACTION_INTERVAL_SECONDS if compaction_interval_seconds is None
+            else compaction_interval_seconds
+        )
+        self.shard = shard or default_shard()
+        self.leader = LeaderLock(engine, shard_index=self.shard.index)
+        self._tasks: List[asyncio.Task] = []
+
+    async def run_once(self) -> Optional[MonitoringStats]:
+        """Um tick do monitor; None se este processo não é o líder"""
+        if not await self.leader.acquire():
+            return None
+        async with SessionLocal() as db:
+            service = PriceMonitorService(db, self.http_client, self.executor, self.shard)
+            return await service.monitor_due_games()
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                # Um tick com erro (banco/API) não derruba o loop
+                logger.error(f"Erro no tick do monitor: {e!r}")
+            await asyncio.sleep(self.tick_seconds)
+
+    async def _compaction_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.compaction_interval_seconds)
+            try:
+                # A compactação percorre todos os deals: só o líder da shard 0 roda
+                if self.shard.index == 0 and await self.leader.acquire():
+                    await compact_price_history()
+            except Exception as e:
+                logger.error(f"Erro na compactação de price_history: {e!r}")
+
+    def start(self) -> List[asyncio.Task]:
+        """Cria as tasks dos loops (a compactação só se o intervalo for > 0)"""
+        self._tasks = [asyncio.create_task(self._monitor_loop())]
+        if self.compaction_interval_seconds > 0:
+            self._tasks.append(asyncio.create_task(self._compaction_loop()))
+        return self._tasks
+
+    async def run_forever(self) -> None:
+        await asyncio.gather(*self.start())
+
+    async def stop(self) -> None:
+        """Cancela os loops e libera a liderança"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        await self.leader.release()
@@ -0,0 +1,68 @@
+# services/monitor_scheduler.py
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Intervalo de um jogo "normal"; mantém o nome da config do loop fixo antigo
+MONITOR_BASE_INTERVAL_SECONDS = float(os.getenv("PRICE_UPDATE_INTERVAL_SECONDS", "1800"))
+MONITOR_MIN_INTERVAL_SECONDS = float(os.getenv("MONITOR_MIN_INTERVAL_SECONDS", "600"))
+MONITOR_MAX_INTERVAL_SECONDS = float(os.getenv("MONITOR_MAX_INTERVAL_SECONDS", "86400"))
+# Janela usada para medir a frequência de mudanças e o "rastreado recentemente"
+MONITOR_ACTIVITY_WINDOW_DAYS = int(os.getenv("MONITOR_ACTIVITY_WINDOW_DAYS", "30"))
+# Verificações desejadas entre duas mudanças de preço típicas do jogo
+MONITOR_CHECKS_PER_CHANGE = float(os.getenv("MONITOR_CHECKS_PER_CHANGE", "4"))
+# Variação aleatória (+/-) do intervalo para espalhar os jogos entre os ticks
+MONITOR_JITTER_RATIO = float(os.getenv("MONITOR_JITTER_RATIO", "0.1"))
+
+
+@dataclass
+class GameActivity:
+    """Sinais usados para agendar a próxima verificação de um jogo"""
+    price_changes: int = 0  # intervalos de preço iniciados na janela
+    on_sale: bool = False
+    tracked_at: Optional[datetime] = None
+
+
+def next_check_delay(activity: GameActivity, now: datetime) -> float:
+    """
+    Intervalo (segundos, sem jitter) até a próxima verificação
+
+    - Preço parado: cresce até MONITOR_MAX_INTERVAL_SECONDS
+    - Mudanças frequentes: ~MONITOR_CHECKS_PER_CHANGE verificações por mudança
+    - Em promoção ou rastreado há pouco: no máximo o intervalo base
+    """
+    window_seconds = MONITOR_ACTIVITY_WINDOW_DAYS * 86400
+    if activity.price_changes > 0:
+        delay = window_seconds / (activity.price_changes * MONITOR_CHECKS_PER_CHANGE)
+    else:
+        delay = MONITOR_MAX_INTERVAL_SECONDS
+
+    # Promoções terminam sem aviso; jogos recém-rastreados ainda não têm histórico
+    tracked_at = activity.tracked_at
+    if tracked_at is not None and tracked_at.tzinfo is None:
+        # SQLite devolve datetimes sem tzinfo, já em UTC
+        tracked_at = tracked_at.replace(tzinfo=timezone.utc)
+    recently_tracked = (
+        tracked_at is not None
+        and now - tracked_at < timedelta(days=MONITOR_ACTIVITY_WINDOW_DAYS)
+    )
+    if activity.on_sale or recently_tracked:
+        delay = min(delay, MONITOR_BASE_INTERVAL_SECONDS)
+
+    return min(max(delay, MONITOR_MIN_INTERVAL_SECONDS), MONITOR_MAX_INTERVAL_SECONDS)
+
+
+def _jittered(now: datetime, delay: float) -> datetime:
+    return now + timedelta(seconds=delay * (1 + random.uniform(-MONITOR_JITTER_RATIO, MONITOR_JITTER_RATIO)))
+
+
+def next_check_at(activity: GameActivity, now: datetime) -> datetime:
+    """Próxima verificação do jogo, com jitter para não vencerem todos no mesmo tick"""
+    return _jittered(now, next_check_delay(activity, now))
+
+
+def retry_at(now: datetime) -> datetime:
+    """Nova tentativa para um jogo cuja verificação falhou"""
+    return _jittered(now, MONITOR_MIN_INTERVAL_SECONDS)
@@ -0,0 +1,35 @@
+# services/monitor_shard.py
+import os
+from dataclasses import dataclass
+
+# Fatia dos jogos deste processo: games.id % MONITOR_SHARD_COUNT == MONITOR_SHARD_INDEX
+MONITOR_SHARD_INDEX = int(os.getenv("MONITOR_SHARD_INDEX", "0"))
+MONITOR_SHARD_COUNT = int(os.getenv("MONITOR_SHARD_COUNT", "1"))
+
+
+@dataclass(frozen=True)
+class MonitorShard:
+    """
+    Partição dos jogos entre processos do monitor (por id módulo count)
+
+    Todos os workers precisam do mesmo `count`; cada índice de 0 a count-1
+    deve ter ao menos um processo rodando (extras viram seguidores do líder
+    da mesma shard).
+    """
+    index: int = 0
+    count: int = 1
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Shard inválida: índice {self.index} de {self.count}")
+
+    @property
+    def is_sharded(self) -> bool:
+        return self.count > 1
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def default_shard() -> MonitorShard:
+    return MonitorShard(MONITOR_SHARD_INDEX, MONITOR_SHARD_COUNT)
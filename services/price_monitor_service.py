@@ -1,38 +1,79 @@
 import logging
+import os
 import time
-from typing import List, Optional
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from repositories.game_repository import GameRepository
 from repositories.deal_repository import DealRepository
+from repositories.game_price_summary_repository import GamePriceSummaryRepository
 from repositories.price_history_repository import PriceHistoryRepository
 from repositories.price_alert_repository import PriceAlertRepository
+from repositories.monitor_shard_stats_repository import MonitorShardStatsRepository
 from services.cheap_shark_service import CheapSharkService
+from services.monitor_executor import MonitorExecutor
+from services.monitor_scheduler import MONITOR_ACTIVITY_WINDOW_DAYS, GameActivity, next_check_at, retry_at
+from services.monitor_shard import MonitorShard, default_shard
+from db.unit_of_work import unit_of_work
+from core.fingerprint import deals_fingerprint
 from schemas.monitoring import MonitoringStats, GameCheckResult
 from schemas.game_lookup import GameLookupResponse
 
 logger = logging.getLogger(__name__)
 
+# Máximo de jogos vencidos verificados por tick (orçamento de chamadas à CheapShark)
+MONITOR_MAX_GAMES_PER_TICK = int(os.getenv("MONITOR_MAX_GAMES_PER_TICK", "500"))
+
 
 class PriceMonitorService:
     """Serviço para monitoramento contínuo de preços e detecção de promoções"""
 
-    def __init__(self, db: Session):
+    def __init__(
+            self,
+            db: AsyncSession,
+            http_client: Optional[httpx.AsyncClient] = None,
+            executor: Optional[MonitorExecutor] = None,
+            shard: Optional[MonitorShard] = None
+    ):
         self.db = db
-        self.games = GameRepository(db)
-        self.deals = DealRepository(db)
-        self.history = PriceHistoryRepository(db)
-        self.alerts = PriceAlertRepository(db)
-        self.cheapshark = CheapSharkService()
-
-    async def monitor_all_tracked_games(self) -> MonitoringStats:
+        # Repositórios em unit of work: uma transação por jogo verificado
+        self.games = GameRepository(db, autocommit=False)
+        self.deals = DealRepository(db, autocommit=False)
+        self.history = PriceHistoryRepository(db, autocommit=False)
+        self.alerts = PriceAlertRepository(db, autocommit=False)
+        self.summaries = GamePriceSummaryRepository(db, autocommit=False)
+        # Sem cliente HTTP só as consultas ao banco (alertas, estatísticas) ficam disponíveis
+        self.cheapshark = CheapSharkService(http_client) if http_client is not None else None
+        self.executor = executor or MonitorExecutor()
+        self.shard = shard or default_shard()
+        self.shard_stats = MonitorShardStatsRepository(db, autocommit=False)
+
+    async def monitor_due_games(self, limit: Optional[int] = None) -> MonitoringStats:
         """
-        Monitora todos os jogos rastreados e detecta mudanças de preço
+        Monitora só os jogos com next_check_at vencido (mais atrasados primeiro)
 
-        Returns:
-            MonitoringStats: Estatísticas completas da execução
+        Cada jogo verificado é reagendado conforme sua atividade recente
+        (ver services/monitor_scheduler.py). Só pega os jogos da shard deste
+        serviço e soma o resultado aos totais dela (monitor_shard_stats).
         """
+        due_games = [
+            (game.id, game.external_id, game.title)
+            for game in await self.games.get_due(
+                datetime.now(timezone.utc),
+                limit or MONITOR_MAX_GAMES_PER_TICK,
+                shard_index=self.shard.index,
+                shard_count=self.shard.count,
+            )
+        ]
+        stats = await self._monitor_games(due_games)
+        async with unit_of_work(self.db):
+            await self.shard_stats.record(stats)
+        return stats
+
+    async def _monitor_games(self, tracked_games: List[Tuple[int, str, str]]) -> MonitoringStats:
+        """Verifica os jogos (id, gameID, título) e reagenda a próxima verificação de cada um"""
         start_time = time.time()  # Para calcular duração
         started_at = datetime.now(timezone.utc)  # Timestamp para o schema
 
@@ -42,33 +83,58 @@ class PriceMonitorService:
             new_sales=0,
             price_drops=0,
             errors=0,
-            started_at=started_at
+            started_at=started_at,
+            shard_index=self.shard.index,
+            shard_count=self.shard.count
         )
 
         logger.info("Iniciando monitoramento de preços...")
-
-        # Pega todos os jogos rastreados
-        tracked_games = self.games.get_all(limit=1000)
         stats.games_checked = len(tracked_games)
-
-        for game in tracked_games:
-            try:
-                result = await self._check_game_deals(game.id)
-                stats.deals_updated += result.deals_updated
-                stats.new_sales += result.new_sales
-                stats.price_drops += result.price_drops
-
-            except Exception as e:
-                logger.error(f"Erro ao verificar jogo {game.title} (ID: {game.id}): {e}")
-                stats.errors += 1
+        failed_games: Set[int] = set()
+
+        # Lotes do lookup multi-ID da CheapShark, buscados concorrentemente
+        batch_size = self.cheapshark.GAMES_BULK_MAX_IDS
+        batches = [tracked_games[i:i + batch_size] for i in range(0, len(tracked_games), batch_size)]
+
+        async def fetch_batch(batch):
+            return await self.cheapshark.get_games_deals_bulk([external_id for _, external_id, _ in batch])
+
+        async def write_batch(batch, deals_by_external_id):
+            for game_id, external_id, title in batch:
+                try:
+                    async with unit_of_work(self.db):
+                        result = await self._check_game_deals(game_id, deals_by_external_id.get(external_id))
+                    if result.unchanged:
+                        stats.games_unchanged += 1
+                    stats.deals_updated += result.deals_updated
+                    stats.new_sales += result.new_sales
+                    stats.price_drops += result.price_drops
+                    if result.error:
+                        # Jogo ausente no lookup ou removido: tenta de novo mais cedo
+                        stats.errors += 1
+                        failed_games.add(game_id)
+
+                except Exception as e:
+                    logger.error(f"Erro ao verificar jogo {title} (ID: {game_id}): {e}")
+                    stats.errors += 1
+                    failed_games.add(game_id)
+
+        outcome = await self.executor.run(batches, fetch_batch, write_batch)
+        for batch, _ in outcome.failed:
+            # Falha na busca do lote: todos os jogos dele contam como erro
+            stats.errors += len(batch)
+            failed_games.update(game_id for game_id, _, _ in batch)
+
+        await self._reschedule((game_id for game_id, _, _ in tracked_games), failed_games)
 
         # Finalizar estatísticas
         stats.finished_at = datetime.now(timezone.utc)
         stats.duration_seconds = round(time.time() - start_time, 2)
 
         logger.info(f"""
-        Monitoramento concluído em {stats.duration_seconds}s:
+        Monitoramento concluído em {stats.duration_seconds}s (shard {self.shard}):
         - Jogos verificados: {stats.games_checked}
+        - Jogos sem mudança: {stats.games_unchanged}
         - Deals atualizados: {stats.deals_updated}
         - Novas promoções: {stats.new_sales}
         - Quedas de preço: {stats.price_drops}
@@ -77,9 +143,27 @@ class PriceMonitorService:
 
         return stats
 
-    async def _check_game_deals(self, game_id: int) -> GameCheckResult:
-        """Verifica deals de um jogo específico e detecta mudanças"""
-        game = self.games.get_by_id(game_id)
+    async def _reschedule(self, game_ids: Iterable[int], failed_games: Set[int]) -> None:
+        """Grava next_check_at dos jogos verificados (falhas de busca/gravação tentam de novo mais cedo)"""
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(days=MONITOR_ACTIVITY_WINDOW_DAYS)
+        async with unit_of_work(self.db):
+            activity = await self.games.get_activity(game_ids, since)
+            await self.games.set_next_checks({
+                game_id: (
+                    retry_at(now) if game_id in failed_games
+                    else next_check_at(GameActivity(changes, on_sale, tracked_at), now)
+                )
+                for game_id, (changes, on_sale, tracked_at) in activity.items()
+            })
+
+    async def _check_game_deals(
+            self,
+            game_id: int,
+            deals_response: Optional[GameLookupResponse]
+    ) -> GameCheckResult:
+        """Verifica deals de um jogo específico (já buscados na API) e detecta mudanças"""
+        game = await self.games.get_by_id(game_id)
         if not game:
             return GameCheckResult(
                 game_id=game_id,
@@ -92,70 +176,81 @@ class PriceMonitorService:
             game_title=game.title
         )
 
-        # Busca deals atuais na API
-        deals_response: Optional[GameLookupResponse] = await self.cheapshark.get_game_deals(game.external_id)
         if not deals_response:
             result.error = "Failed to fetch deals from API"
             return result
 
         now = datetime.now(timezone.utc)
 
-        for deal_data in deals_response.deals:
-            if not deal_data.deal_id:
-                continue
-
-            # Verifica se deal já existe no banco
-            existing_deal = self.deals.get_by_deal_id(deal_data.deal_id)
+        # Payload idêntico ao do último ciclo: só registra a verificação
+        fingerprint = deals_fingerprint(deals_response.deals)
+        if game.deals_fingerprint == fingerprint:
+            await self.history.record_unchanged(game.id, now)
+            await self.games.update(game.id, {"last_checked_at": now})
+            result.unchanged = True
+            return result
 
-            if existing_deal:
+        deals = [deal_data for deal_data in deals_response.deals if deal_data.deal_id]
+
+        # Estado anterior dos deals já existentes (lido antes do upsert)
+        previous = {
+            existing.deal_id: (existing.current_price, existing.is_on_sale)
+            for existing in await self.deals.get_by_deal_ids(deal_data.deal_id for deal_data in deals)
+        }
+
+        # Atualiza/cria todos os deals do jogo em lote e registra no histórico
+        row_ids = await self.deals.upsert_many([deal_data.to_deal_payload(game.id, now) for deal_data in deals])
+        await self.history.create_many([
+            {
+                "deal_id": row_ids[deal_data.deal_id],
+                "price": deal_data.price,
+                "discount_percent": deal_data.discount_percentage,
+                "checked_at": now,
+            }
+            for deal_data in deals
+        ])
+        await self.summaries.refresh([game.id])
+
+        for deal_data in deals:
+            deal_row_id = row_ids[deal_data.deal_id]
+
+            if deal_data.deal_id in previous:
                 # Deal existente - verifica mudanças
-                changes = await self._check_price_changes(existing_deal, deal_data, now)
+                old_price, old_is_on_sale = previous[deal_data.deal_id]
+                changes = await self._check_price_changes(deal_row_id, old_price, old_is_on_sale, deal_data)
                 result.deals_updated += 1
                 if changes.get('new_sale'):
                     result.new_sales += 1
                 if changes.get('price_drop'):
                     result.price_drops += 1
             else:
-                # Novo deal - cria e registra alerta
-                is_sale = await self._create_new_deal(game.id, deal_data, now)
+                # Novo deal - registra alerta
+                is_sale = await self._alert_new_deal(deal_row_id, deal_data)
                 result.deals_updated += 1
                 if is_sale:
                     result.new_sales += 1
 
+        await self.games.update(game.id, {"deals_fingerprint": fingerprint, "last_checked_at": now})
         return result
 
-    async def _check_price_changes(self, existing_deal, new_deal_data, now: datetime) -> dict:
+    async def _check_price_changes(
+            self,
+            deal_row_id: int,
+            old_price: float,
+            old_is_on_sale: bool,
+            new_deal_data
+    ) -> dict:
         """
-        Verifica e registra mudanças de preço
+        Verifica mudanças de preço de um deal já gravado e registra alertas
 
         Returns:
             dict: {'new_sale': bool, 'price_drop': bool}
         """
         changes = {'new_sale': False, 'price_drop': False}
 
-        old_price = existing_deal.current_price
         new_price = new_deal_data.price
-        old_is_on_sale = existing_deal.is_on_sale
         new_is_on_sale = new_deal_data.is_on_sale
 
-        # Atualiza deal
-        self.deals.update(existing_deal.id, {
-            "current_price": new_price,
-            "original_price": new_deal_data.original_price,
-            "discount_percentage": new_deal_data.discount_percentage,
-            "is_on_sale": new_is_on_sale,
-            "url": new_deal_data.url,
-            "last_checked_at": now,
-        })
-
-        # Registra no histórico
-        self.history.create({
-            "deal_id": existing_deal.id,
-            "price": new_price,
-            "discount_percent": new_deal_data.discount_percentage,
-            "checked_at": now,
-        })
-
         # Detecta mudanças significativas
         price_changed = abs(old_price - new_price) > 0.01
         sale_status_changed = old_is_on_sale != new_is_on_sale
@@ -168,8 +263,8 @@ class PriceMonitorService:
                 f"De ${old_price:.2f} por ${new_price:.2f} "
                 f"(-{new_deal_data.discount_percentage:.0f}%)"
             )
-            self.alerts.create({
-                "deal_id": existing_deal.id,
+            await self.alerts.create({
+                "deal_id": deal_row_id,
                 "alert_type": "new_sale",
                 "previous_price": old_price,
                 "new_price": new_price,
@@ -190,8 +285,8 @@ class PriceMonitorService:
                     f"De ${old_price:.2f} para ${new_price:.2f} "
                     f"(-{price_drop_percent:.1f}%)"
                 )
-                self.alerts.create({
-                    "deal_id": existing_deal.id,
+                await self.alerts.create({
+                    "deal_id": deal_row_id,
                     "alert_type": "price_drop",
                     "previous_price": old_price,
                     "new_price": new_price,
@@ -202,37 +297,13 @@ class PriceMonitorService:
 
         return changes
 
-    async def _create_new_deal(self, game_id: int, deal_data, now: datetime) -> bool:
+    async def _alert_new_deal(self, deal_row_id: int, deal_data) -> bool:
         """
-        Cria novo deal e registra alerta
+        Registra alerta para um deal recém-criado
 
         Returns:
             bool: True se o deal está em promoção
         """
-        deal = self.deals.create({
-            "game_id": game_id,
-            "deal_id": deal_data.deal_id,
-            "store_id": deal_data.store_id,
-            "store_name": deal_data.store_name,
-            "current_price": deal_data.price,
-            "original_price": deal_data.original_price,
-            "discount_percentage": deal_data.discount_percentage,
-            "is_on_sale": deal_data.is_on_sale,
-            "url": deal_data.url,
-            "last_checked_at": now,
-        })
-
-        if not deal:
-            return False
-
-        # Registra no histórico
-        self.history.create({
-            "deal_id": deal.id,
-            "price": deal_data.price,
-            "discount_percent": deal_data.discount_percentage,
-            "checked_at": now,
-        })
-
         # Se já estiver em promoção, cria alerta
         if deal_data.is_on_sale:
             message = (
@@ -240,8 +311,8 @@ class PriceMonitorService:
                 f"${deal_data.price:.2f} "
                 f"(-{deal_data.discount_percentage:.0f}%)"
             )
-            self.alerts.create({
-                "deal_id": deal.id,
+            await self.alerts.create({
+                "deal_id": deal_row_id,
                 "alert_type": "new_deal",
                 "previous_price": None,
                 "new_price": deal_data.price,
@@ -253,10 +324,14 @@ class PriceMonitorService:
 
         return False
 
-    def get_recent_alerts(self, limit: int = 50) -> List:
+    async def get_shard_stats(self) -> List:
+        """Totais acumulados de cada shard do monitor"""
+        return await self.shard_stats.get_all_shards()
+
+    async def get_recent_alerts(self, limit: int = 50) -> List:
         """Retorna alertas recentes"""
-        return self.alerts.get_unread(limit=limit)
+        return await self.alerts.get_unread(limit=limit)
 
-    def get_all_alerts(self, skip: int = 0, limit: int = 100) -> List:
+    async def get_all_alerts(self, skip: int = 0, limit: int = 100) -> List:
         """Retorna todos os alertas"""
-        return self.alerts.get_all(skip=skip, limit=limit)
+        return await self.alerts.get_all(skip=skip, limit=limit)
@@ -0,0 +1,86 @@
+# services/rate_limiter.py
+import asyncio
+import os
+import time
+from typing import Dict
+
+CHEAP_SHARK_RATE_LIMIT_RPS = float(os.getenv("CHEAP_SHARK_RATE_LIMIT_RPS", "5"))
+CHEAP_SHARK_RATE_LIMIT_BURST = int(os.getenv("CHEAP_SHARK_RATE_LIMIT_BURST", "10"))
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket assíncrono compartilhado pelo processo
+
+    Emite até `rate` requisições por segundo com rajadas de até `burst`.
+    `pause()` suspende a emissão (ex.: Retry-After de um 429), fazendo todos os
+    callers desacelerarem juntos. O tempo de espera é acumulado como métrica.
+    """
+
+    def __init__(self, rate: float = CHEAP_SHARK_RATE_LIMIT_RPS, burst: int = CHEAP_SHARK_RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.delayed = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.throttled_responses = 0
+        self.retries = 0
+
+    async def acquire(self) -> float:
+        """Aguarda um token e retorna quanto tempo esperou (segundos)"""
+        started = time.monotonic()
+
+        # O lock mantém a ordem de chegada entre os callers que estão esperando
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Suspende a emissão de tokens por `seconds` e esvazia o bucket"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        # Os tokens só voltam a acumular depois do fim da pausa
+        self._updated_at = self._paused_until
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "throttled_responses": self.throttled_responses,
+            "retries": self.retries,
+        }
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+
+rate_limiter = TokenBucketRateLimiter()
@@ -0,0 +1,133 @@
+# services/response_cache.py
+import asyncio
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_STALE_SECONDS = int(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "60"))
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Cache em memória (TTL + LRU) para respostas da CheapShark
+
+    As entradas expiram pelo TTL do endpoint e são despejadas por LRU quando o
+    número de entradas ou o tamanho total (bytes) passa do limite. Com
+    `stale_seconds` > 0, uma entrada expirada ainda é servida por esse período
+    enquanto uma task em segundo plano a revalida (stale-while-revalidate).
+    """
+
+    def __init__(
+            self,
+            max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+            stale_seconds: int = RESPONSE_CACHE_STALE_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._revalidating: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: Hashable, ttl_seconds: float, loader: Loader) -> Any:
+        """Retorna o valor em cache ou carrega via `loader` (None não é cacheado)"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+
+            if now < entry.expires_at + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._revalidate(key, ttl_seconds, loader)
+                return entry.value
+
+        self.misses += 1
+        value = await loader()
+        self.set(key, value, ttl_seconds)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        """Grava um valor no cache, despejando as entradas menos usadas se preciso"""
+        if value is None:
+            return
+
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+
+        self._discard(key)
+        self._entries[key] = _CacheEntry(value=value, size=size, expires_at=time.monotonic() + ttl_seconds)
+        self._size += size
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._discard(oldest_key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+        }
+
+    def _discard(self, key: Hashable) -> None:
+        entry: Optional[_CacheEntry] = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def _revalidate(self, key: Hashable, ttl_seconds: float, loader: Loader) -> None:
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+
+        async def refresh() -> None:
+            try:
+                self.set(key, await loader(), ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Falha ao revalidar cache {key!r}: {e!r}")
+            finally:
+                self._revalidating.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,101 @@
+# services/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+def _mark_retrieved(future: asyncio.Future) -> None:
+    # Evita o aviso "exception was never retrieved" quando ninguém mais aguarda
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas idênticas em andamento
+
+    Enquanto uma chamada para uma chave está em voo, as demais chamadas com a
+    mesma chave aguardam o mesmo future em vez de disparar outra requisição.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa `fn` uma única vez por chave em voo e compartilha o resultado"""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Quem iniciou a chamada foi cancelado: tentamos por conta própria
+                return await self.do(key, fn)
+
+        future = self._claim(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def do_many(
+            self,
+            keys: Sequence[Hashable],
+            fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """
+        Versão em lote: chaves já em voo são aguardadas e as restantes são
+        carregadas em uma única chamada `fn(chaves)`, que retorna chave -> valor
+        """
+        waiting = {key: self._inflight[key] for key in keys if key in self._inflight}
+        owned = {key: self._claim(key) for key in dict.fromkeys(keys) if key not in waiting}
+
+        results: Dict[Hashable, Any] = {}
+        if owned:
+            try:
+                loaded = await fn(list(owned))
+            except BaseException as e:
+                for key, future in owned.items():
+                    self._settle(key, future, error=e)
+                raise
+            for key, future in owned.items():
+                results[key] = loaded.get(key)
+                self._settle(key, future, result=results[key])
+
+        for key, future in waiting.items():
+            try:
+                results[key] = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                results[key] = (await self.do_many([key], fn)).get(key)
+            except Exception:
+                # A chamada de outro caller falhou; este lote segue sem a chave
+                results[key] = None
+
+        return results
+
+    def _claim(self, key: Hashable) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_mark_retrieved)
+        self._inflight[key] = future
+        return future
+
+    def _settle(self, key: Hashable, future: asyncio.Future, result: Any = None,
+                error: Optional[BaseException] = None) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+single_flight = SingleFlight()
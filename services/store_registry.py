@@ -0,0 +1,81 @@
+# services/store_registry.py
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STORE_CACHE_TTL_SECONDS = int(os.getenv("STORE_CACHE_TTL_SECONDS", str(60 * 60 * 24)))
+STORE_CACHE_RETRY_SECONDS = int(os.getenv("STORE_CACHE_RETRY_SECONDS", "30"))
+
+StoresFetcher = Callable[[], Awaitable[List[Dict]]]
+
+
+class StoreRegistry:
+    """
+    Diretório de stores da CheapShark compartilhado por todo o processo
+
+    Carrega /stores uma vez por TTL. Depois de expirar, continua servindo os
+    dados antigos enquanto uma única task revalida em segundo plano (sob lock).
+    """
+
+    def __init__(self, ttl_seconds: int = STORE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._stores: List[Dict] = []
+        self._names: Dict[str, str] = {}
+        self._loaded_at: float = 0.0
+        self._failed_at: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return bool(self._stores) and (time.monotonic() - self._loaded_at) < self.ttl_seconds
+
+    async def ensure_loaded(self, fetch: StoresFetcher) -> None:
+        """Garante que o diretório está carregado (stale-while-revalidate)"""
+        if self.is_fresh:
+            return
+
+        # Falha recente (com ou sem dados antigos): espera antes de chamar /stores de novo
+        if self._failed_at and (time.monotonic() - self._failed_at) < STORE_CACHE_RETRY_SECONDS:
+            return
+
+        if self._stores:
+            # Dados expirados: serve o que tem e revalida em segundo plano
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh(fetch))
+            return
+
+        await self._refresh(fetch)
+
+    async def _refresh(self, fetch: StoresFetcher) -> None:
+        async with self._lock:
+            # Outra task pode ter recarregado enquanto esperávamos o lock
+            if self.is_fresh:
+                return
+            try:
+                stores = await fetch()
+            except Exception as e:
+                logger.warning(f"Falha ao carregar stores da CheapShark: {e!r}")
+                self._failed_at = time.monotonic()
+                return
+
+            self._stores = stores
+            self._names = {s["storeID"]: s["storeName"] for s in stores}
+            self._loaded_at = time.monotonic()
+            self._failed_at = 0.0
+
+    def get_name(self, store_id: Optional[str]) -> Optional[str]:
+        """Resolve storeID -> storeName em memória"""
+        if not store_id:
+            return None
+        return self._names.get(store_id)
+
+    def get_stores(self) -> List[Dict]:
+        return list(self._stores)
+
+
+store_registry = StoreRegistry()
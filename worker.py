@@ -0,0 +1,89 @@
+# worker.py
+"""
+Worker dedicado do monitor de preços, em processo separado da API
+
+Uso: python -m worker [--once] [--concurrency N] [--http-max-connections N] [--tick-seconds N]
+                      [--shard-index I --shard-count N]
+
+Com o worker rodando, suba a API com MONITOR_IN_APP=false para que o monitor
+não dispute o event loop com as requisições. O pool do banco deste processo
+segue DB_POOL_SIZE / DB_MAX_OVERFLOW do seu próprio ambiente.
+
+Para escalar, rode N workers com --shard-count N e índices 0..N-1: cada um
+verifica só os jogos com id % N == índice. Os totais por shard ficam em
+GET /games/monitor/shards.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+from db.engine import engine
+import db.models  # noqa: F401
+from services.http_client import create_http_client
+from services.monitor_executor import MonitorExecutor
+from services.monitor_runner import MonitorRunner
+from services.monitor_shard import MONITOR_SHARD_COUNT, MONITOR_SHARD_INDEX, MonitorShard
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Worker do monitor de preços")
+    parser.add_argument("--once", action="store_true", help="Executa um único tick e sai")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Buscas simultâneas na CheapShark (padrão: MONITOR_CONCURRENCY)")
+    parser.add_argument("--http-max-connections", type=int, default=None,
+                        help="Conexões HTTP do pool (padrão: HTTP_MAX_CONNECTIONS)")
+    parser.add_argument("--tick-seconds", type=int, default=None,
+                        help="Intervalo entre ticks (padrão: MONITOR_TICK_SECONDS)")
+    parser.add_argument("--shard-index", type=int, default=MONITOR_SHARD_INDEX,
+                        help="Shard deste worker, de 0 a shard-count - 1 (padrão: MONITOR_SHARD_INDEX)")
+    parser.add_argument("--shard-count", type=int, default=MONITOR_SHARD_COUNT,
+                        help="Total de shards, igual em todos os workers (padrão: MONITOR_SHARD_COUNT)")
+    args = parser.parse_args(argv)
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index deve estar entre 0 e --shard-count - 1")
+    return args
+
+
+async def run(args: argparse.Namespace) -> None:
+    shard = MonitorShard(args.shard_index, args.shard_count)
+    http_client = create_http_client(max_connections=args.http_max_connections)
+    runner = MonitorRunner(
+        http_client,
+        executor=MonitorExecutor(concurrency=args.concurrency),
+        tick_seconds=args.tick_seconds,
+        shard=shard,
+    )
+
+    # SIGTERM (docker/systemd) encerra como o Ctrl+C: cancela e libera a liderança
+    current = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, current.cancel)
+
+    try:
+        if args.once:
+            stats = await runner.run_once()
+            if stats is None:
+                logger.info(f"Outro processo é o líder da shard {shard}; nada a fazer")
+        else:
+            logger.info(f"Worker do monitor iniciado (shard {shard})")
+            await runner.run_forever()
+    finally:
+        await runner.stop()
+        await http_client.aclose()
+        await engine.dispose()
+
+
+def main(argv: Optional[list] = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run(_parse_args(argv)))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logger.info("Worker do monitor encerrado")
+
+
+if __name__ == "__main__":
+    main()